@@ -1,138 +1,304 @@
-import sys
+import argparse
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import replace
 from tkinter import ttk
-from PIL import Image, ImageEnhance, ImageTk
-
-canvas, contrast_label, threshold_label, brightness_label = None, None, None, None
-# Load your image (replace 'your_image.jpg' with the path to your image)
-original_image = Image.open(sys.argv[1])
-original_width, original_height = original_image.size
-
-# Create a window
-window = tk.Tk()
-window.title("Image Adjustment Tool")
-window.minsize(original_width + 200, original_height + 200)
-
-
-def update_image(*args):
-    if (
-        canvas is None
-        or brightness_label is None
-        or contrast_label is None
-        or threshold_label is None
-    ):
-        return
-    # Update scale labels with current values
-    brightness_label.config(text=f"Brightness: {brightness_scale.get():.1f}")
-    threshold_label.config(text=f"Threshold: {threshold_scale.get():.0f}")
-    contrast_label.config(text=f"Contrast: {contrast_scale.get():.1f}")
-
-    brightness_factor = brightness_scale.get()
-    threshold_factor = int(threshold_scale.get())
-    contrast_factor = contrast_scale.get()
-
-    # Adjust brightness
-    enhancer = ImageEnhance.Brightness(original_image)
-    preprocessed_image = enhancer.enhance(brightness_factor)
-
-    # Adjust contrast
-    enhancer = ImageEnhance.Contrast(preprocessed_image)
-    preprocessed_image = enhancer.enhance(contrast_factor)
-
-    # # Apply zoom
-    # new_width = original_width * zoom_factor
-    # new_height = original_height * zoom_factor
-    # zoomed_image = contrast_image.resize((new_width, new_height))
-    # # Apply thresholding
-    if threshold_factor > 1:
-        preprocessed_image = preprocessed_image.convert("L")
-        preprocessed_image = preprocessed_image.point(
-            lambda p: 255 if p > threshold_factor else 0, "1"
+
+from PIL import Image, ImageTk
+
+from configuration import TableConfiguration
+from OCRLibrary import combine_by_top_range, find_texts, locate_header
+from preprocess import (
+    grayscale_image,
+    load_image,
+    sharpen_image,
+    threshold_lut,
+    tone_lut,
+)
+
+# Milliseconds to wait after the last slider move before updating
+DEBOUNCE_MS = 120
+# Milliseconds to wait after the last update before starting OCR
+OCR_DELAY_MS = 600
+# The preview is computed at most this many pixels wide
+PREVIEW_WIDTH = 1200
+# Largest zoomed image made for the preview
+MAX_ZOOMED_PIXELS = 16_000_000
+
+
+class PreviewPipeline:
+    """
+    The preprocessing of ``preprocess_image`` run on a downscaled preview.
+
+    The grayscale preview is computed once. Each following stage keeps its
+    last result with the settings it was made with, so changing a setting
+    reruns only the stages from the one using it onwards.
+    """
+
+    STAGES = (
+        ("zoom", ("zoom_factor",)),
+        ("tone", ("brightness", "contrast")),
+        ("sharpen", ("sharpen",)),
+        ("binarize", ("threshold", "invert_colors")),
+    )
+
+    def __init__(self, image: Image.Image, preview_width: int = PREVIEW_WIDTH):
+        self.image = image
+        self.scale = min(1.0, preview_width / image.width)
+        self.gray = grayscale_image(image)
+        self._results = []
+
+    @property
+    def preview_size(self):
+        return (
+            max(int(self.image.width * self.scale), 1),
+            max(int(self.image.height * self.scale), 1),
         )
 
-    # Update the image on canvas
-    photo = ImageTk.PhotoImage(preprocessed_image)
-    canvas.itemconfig(image_on_canvas, image=photo)
-    canvas.image = photo  # Prevent garbage collection
-    canvas.config(scrollregion=canvas.bbox(tk.ALL))
+    def run(self, configuration: TableConfiguration):
+        """Returns the preview and the names of the stages that were rerun."""
+        image = None
+        rerun = []
+        for index, (name, fields) in enumerate(self.STAGES):
+            key = tuple(getattr(configuration, field) for field in fields)
+            if index < len(self._results) and self._results[index][0] == key:
+                image = self._results[index][1]
+                continue
+            del self._results[index:]
+            image = getattr(self, f"_{name}")(image, configuration)
+            self._results.append((key, image))
+            rerun.append(name)
+        return image, rerun
+
+    def _zoom(self, image, configuration):
+        # Zoom like zoom_image, relative to the preview and limited in size,
+        # and bring the result back to the preview size to show the resampling
+        zoom = configuration.zoom_factor * self.scale
+        zoom = min(
+            zoom, (MAX_ZOOMED_PIXELS / (self.gray.width * self.gray.height)) ** 0.5
+        )
+        size = (int(self.gray.width * zoom), int(self.gray.height * zoom))
+        return self.gray.resize(size).resize(self.preview_size)
+
+    def _tone(self, image, configuration):
+        return image.point(tone_lut(image.histogram(), configuration).tolist())
+
+    def _sharpen(self, image, configuration):
+        return sharpen_image(image, configuration)
+
+    def _binarize(self, image, configuration):
+        if configuration.threshold <= 0:
+            return image
+        binary = threshold_lut(
+            configuration.threshold, invert_colors=configuration.invert_colors
+        )
+        return image.point(binary.tolist(), "1")
 
 
-def copy_to_clipboard():
-    clipboard_content = f"""
-    table_conf.brightness = {brightness_scale.get():.1f}
-    table_conf.threshold = {threshold_scale.get():.0f}
-    table_conf.contrast = {contrast_scale.get():.1f}
+def read_layout(image, configuration):
     """
-    window.clipboard_clear()
-    window.clipboard_append(clipboard_content)
+    OCRs the image and returns the word boxes, the row tops and, when the
+    configuration has headers, the column definitions.
+    """
+    words, _ = find_texts(image, configuration=configuration)
+    rows = combine_by_top_range(words, tolerance=configuration.row_tolerance)
+    columns = {}
+    if configuration.headers:
+        try:
+            _, _, columns = locate_header(rows, configuration)
+        except ValueError:
+            columns = {}
+    return words, list(rows), columns
 
 
-# Frame for sliders and labels
-frame_controls = tk.Frame(window)
-frame_controls.pack(fill=tk.X)
+class ImagePreprocessorApp:
+    def __init__(self, window, image, configuration):
+        self.window = window
+        self.configuration = replace(
+            configuration,
+            show_pre_ocr_image=False,
+            show_post_recognition_image=False,
+            debug_artifacts="none",
+        )
+        self.image = image
+        self.pipeline = PreviewPipeline(image)
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self._update_job = None
+        self._ocr_job = None
+        self._ocr_future = None
+        self._ocr_generation = 0
 
-# Brightness control
-brightness_label = ttk.Label(frame_controls, text="Brightness: 1.00")
-brightness_label.pack(side="left")
-brightness_scale = ttk.Scale(
-    frame_controls, from_=0.1, to_=2.0, orient="horizontal", command=update_image
-)
-brightness_scale.set(1.4)  # Default value
-brightness_scale.pack(side="left")
-
-# Zoom control
-threshold_label = ttk.Label(frame_controls, text="Zoom: 1")
-threshold_label.pack(side="left")
-threshold_scale = ttk.Scale(
-    frame_controls,
-    from_=1,
-    to_=256,
-    orient="horizontal",
-    command=update_image,
-)
-threshold_scale.set(190)  # Default value
-threshold_scale.pack(side="left")
-
-# Contrast control
-contrast_label = ttk.Label(frame_controls, text="Contrast: 1.00")
-contrast_label.pack(side="left")
-contrast_scale = ttk.Scale(
-    frame_controls, from_=0.1, to_=2.0, orient="horizontal", command=update_image
-)
-contrast_scale.set(1.2)  # Default value
-contrast_scale.pack(side="left")
+        window.title("Image Adjustment Tool")
+        controls = tk.Frame(window)
+        controls.pack(fill=tk.X)
+        self.variables = {}
+        self.labels = {}
+        for name, low, high in (
+            ("brightness", 0.1, 2.0),
+            ("contrast", 0.1, 2.0),
+            ("threshold", -1, 255),
+            ("zoom_factor", 1, 8),
+        ):
+            self._add_scale(controls, name, low, high)
+        for name in ("sharpen", "invert_colors"):
+            variable = tk.BooleanVar(value=getattr(self.configuration, name))
+            variable.trace_add("write", self.schedule_update)
+            self.variables[name] = variable
+            ttk.Checkbutton(controls, text=name, variable=variable).pack(side="left")
+        self.ocr_enabled = tk.BooleanVar(value=False)
+        self.ocr_enabled.trace_add("write", self.schedule_update)
+        ttk.Checkbutton(controls, text="OCR overlay", variable=self.ocr_enabled).pack(
+            side="left"
+        )
+        ttk.Button(
+            controls, text="Copy to Clipboard", command=self.copy_to_clipboard
+        ).pack(side="left")
+        self.status = ttk.Label(window, text="")
+        self.status.pack(fill=tk.X)
 
-# Button to copy values to clipboard
-copy_button = ttk.Button(
-    frame_controls, text="Copy to Clipboard", command=copy_to_clipboard
-)
-copy_button.pack(side="left")
+        frame_canvas = tk.Frame(window)
+        frame_canvas.pack(fill=tk.BOTH, expand=True)
+        self.canvas = tk.Canvas(frame_canvas, bg="white")
+        scroll_x = tk.Scrollbar(
+            frame_canvas, orient="horizontal", command=self.canvas.xview
+        )
+        scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
+        scroll_y = tk.Scrollbar(
+            frame_canvas, orient="vertical", command=self.canvas.yview
+        )
+        scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.canvas.configure(yscrollcommand=scroll_y.set, xscrollcommand=scroll_x.set)
+        self.image_on_canvas = self.canvas.create_image(0, 0, anchor=tk.NW)
+        self.update_image()
 
-# Frame for the canvas and scrollbars
-frame_canvas = tk.Frame(window)
-frame_canvas.pack(fill=tk.BOTH, expand=True)
+    def _add_scale(self, controls, name, low, high):
+        variable = tk.DoubleVar(value=getattr(self.configuration, name))
+        self.variables[name] = variable
+        self.labels[name] = ttk.Label(controls)
+        self.labels[name].pack(side="left")
+        ttk.Scale(
+            controls,
+            from_=low,
+            to_=high,
+            orient="horizontal",
+            variable=variable,
+            command=self.schedule_update,
+        ).pack(side="left")
 
-# Canvas with scrollbars
-canvas = tk.Canvas(frame_canvas, bg="white")
-canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+    def current_configuration(self):
+        values = {name: variable.get() for name, variable in self.variables.items()}
+        values["threshold"] = int(values["threshold"])
+        # Quarter steps like adaptive zoom
+        values["zoom_factor"] = max(round(values["zoom_factor"] * 4) / 4, 1)
+        values["brightness"] = round(values["brightness"], 1)
+        values["contrast"] = round(values["contrast"], 1)
+        return replace(self.configuration, **values)
 
-scroll_x = tk.Scrollbar(frame_canvas, orient="horizontal", command=canvas.xview)
-scroll_x.pack(side=tk.BOTTOM, fill=tk.X)
-scroll_y = tk.Scrollbar(frame_canvas, orient="vertical", command=canvas.yview)
-scroll_y.pack(side=tk.RIGHT, fill=tk.Y)
+    def schedule_update(self, *args):
+        if self._update_job is not None:
+            self.window.after_cancel(self._update_job)
+        self._update_job = self.window.after(DEBOUNCE_MS, self.update_image)
 
-canvas.configure(yscrollcommand=scroll_y.set, xscrollcommand=scroll_x.set)
+    def update_image(self):
+        self._update_job = None
+        configuration = self.current_configuration()
+        for name, label in self.labels.items():
+            label.config(text=f"{name}: {getattr(configuration, name)}")
+        preview, rerun = self.pipeline.run(configuration)
+        photo = ImageTk.PhotoImage(preview)
+        self.canvas.itemconfig(self.image_on_canvas, image=photo)
+        self.canvas.image = photo  # Prevent garbage collection
+        self.canvas.config(scrollregion=self.canvas.bbox(tk.ALL))
+        self.status.config(text=f"Updated: {', '.join(rerun) or 'nothing'}")
+        self.schedule_ocr(configuration)
 
-# Add the image to the canvas
-photo_image = ImageTk.PhotoImage(
-    original_image.resize((600, int(600 * (original_height / original_width))))
-)
-image_on_canvas = canvas.create_image(0, 0, anchor=tk.NW, image=photo_image)
-canvas.image = photo_image  # Prevent garbage collection
+    def schedule_ocr(self, configuration):
+        self._ocr_generation += 1
+        self.canvas.delete("overlay")
+        if self._ocr_job is not None:
+            self.window.after_cancel(self._ocr_job)
+            self._ocr_job = None
+        if self.ocr_enabled.get():
+            self._ocr_job = self.window.after(
+                OCR_DELAY_MS, self.start_ocr, configuration, self._ocr_generation
+            )
+
+    def start_ocr(self, configuration, generation):
+        self._ocr_job = None
+        self.status.config(text="Reading texts...")
+        future = self.executor.submit(read_layout, self.image, configuration)
+        self.window.after(100, self.poll_ocr, future, generation)
+
+    def poll_ocr(self, future, generation):
+        if not future.done():
+            self.window.after(100, self.poll_ocr, future, generation)
+            return
+        if generation != self._ocr_generation:
+            # The settings changed while reading
+            return
+        try:
+            words, rows, columns = future.result()
+        except Exception as error:
+            self.status.config(text=f"OCR failed: {error}")
+            return
+        self.draw_overlay(words, rows, columns)
+        self.status.config(
+            text=f"{len(words)} words on {len(rows)} rows, {len(columns)} columns"
+        )
+
+    def draw_overlay(self, words, rows, columns):
+        scale = self.pipeline.scale
+        width = self.image.width * scale
+        height = self.image.height * scale
+        for word in words:
+            self.canvas.create_rectangle(
+                word["left"] * scale,
+                word["top"] * scale,
+                word["right"] * scale,
+                word["bottom"] * scale,
+                outline="blue",
+                tags="overlay",
+            )
+        for top in rows:
+            self.canvas.create_line(
+                0, top * scale, width, top * scale, fill="red", tags="overlay"
+            )
+        for column in columns.values():
+            left = column["left"] * scale
+            right = (column["left"] + column["width"]) * scale
+            for x in (left, right):
+                self.canvas.create_line(x, 0, x, height, fill="green", tags="overlay")
+
+    def copy_to_clipboard(self):
+        configuration = self.current_configuration()
+        clipboard_content = "\n".join(
+            f"    table_conf.{name} = {getattr(configuration, name)!r}"
+            for name in self.variables
+        )
+        self.window.clipboard_clear()
+        self.window.clipboard_append(clipboard_content)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Image Adjustment Tool")
+    parser.add_argument("image")
+    parser.add_argument(
+        "--configuration",
+        help="module:function returning a table configuration to start from, "
+        "its headers and columns are shown in the OCR overlay",
+    )
+    args = parser.parse_args(argv)
+    if args.configuration:
+        from tuning import load_configuration
 
-# Initial configuration for scrolling based on the image size
-canvas.config(scrollregion=canvas.bbox(tk.ALL))
+        configuration = load_configuration(args.configuration)
+    else:
+        configuration = TableConfiguration()
+    window = tk.Tk()
+    ImagePreprocessorApp(window, load_image(args.image), configuration)
+    window.mainloop()
 
-update_image()
 
-window.mainloop()
+if __name__ == "__main__":
+    main()
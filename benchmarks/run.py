@@ -0,0 +1,252 @@
+"""
+Benchmarks the OCR pipeline stage by stage on synthetic tables and checks
+the accuracy of the sample image against data/result_table.json.
+
+Run from the repository root with src and the root on PYTHONPATH:
+
+    python -m benchmarks.run --output output/benchmark.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+import numpy as np
+import PIL
+
+from benchmarks.synthetic import generate_table
+from columns import ColumnIndex
+from evaluation import compare_tables
+from OCRLibrary import (
+    combine_by_top_range,
+    find_header_row,
+    find_texts,
+    ocr_table,
+)
+from preprocess import preprocess_image
+
+SCENARIOS = {
+    "small": {"rows": 20, "columns": 5, "font_size": 14},
+    "register": {"rows": 200, "columns": 8, "font_size": 14},
+    "hidpi": {"rows": 40, "columns": 5, "font_size": 28},
+    "window": {"rows": 30, "columns": 6, "font_size": 14, "resolution": (1920, 1080)},
+    "noisy": {"rows": 20, "columns": 5, "font_size": 14, "noise": 0.08},
+}
+SAMPLE_IMAGE = "images/table.png"
+SAMPLE_RESULT = "data/result_table.json"
+
+
+def time_stage(function, repeat: int):
+    """Runs the function repeatedly and returns its timings and last result."""
+    timings = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return {
+        "repeat": repeat,
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "max": max(timings),
+    }, result
+
+
+def run_stage(results, name, function, repeat, **extra):
+    try:
+        timing, result = time_stage(function, repeat)
+    except Exception as error:  # e.g. Tesseract is not installed
+        results[name] = {"error": f"{type(error).__name__}: {error}"}
+        return None
+    timing.update(extra)
+    results[name] = timing
+    return result
+
+
+def without_coordinates(table):
+    return [{k: v for k, v in row.items() if k not in ("x", "y")} for row in table]
+
+
+def benchmark_scenario(parameters, repeat: int, skip_ocr: bool):
+    synthetic = generate_table(**parameters)
+    configuration = synthetic.configuration
+    words = list(synthetic.words)
+    random.Random(0).shuffle(words)
+    rows = combine_by_top_range(words, tolerance=configuration.row_tolerance)
+    columns = ColumnIndex(synthetic.column_definitions)
+    stages = {}
+    run_stage(
+        stages,
+        "preprocess_image",
+        lambda: preprocess_image(synthetic.image, configuration),
+        repeat,
+        pixels=synthetic.image.width * synthetic.image.height,
+    )
+    run_stage(
+        stages,
+        "combine_by_top_range",
+        lambda: combine_by_top_range(words, tolerance=configuration.row_tolerance),
+        repeat,
+        words=len(words),
+    )
+    run_stage(
+        stages,
+        "find_header_row",
+        lambda: find_header_row(rows, synthetic.headers),
+        repeat,
+        rows=len(rows),
+    )
+    # Words in row order, as build_table assigns them
+    row_words = [word for row in rows.values() for word in row]
+    mode = configuration.column_assignment
+    run_stage(
+        stages,
+        "column_assignment",
+        lambda: columns.assign_many(
+            [w["left"] for w in row_words], [w["right"] for w in row_words], mode
+        ),
+        repeat,
+        words=len(row_words),
+    )
+    run_stage(
+        stages,
+        "column_assignment_per_word",
+        lambda: [columns.assign(w["left"], w["right"], mode) for w in row_words],
+        repeat,
+        words=len(row_words),
+    )
+    result = {
+        "parameters": {
+            **parameters,
+            "width": synthetic.image.width,
+            "height": synthetic.image.height,
+        },
+        "stages": stages,
+    }
+    if skip_ocr:
+        return result
+    texts = run_stage(
+        stages,
+        "find_texts",
+        lambda: find_texts(synthetic.image, configuration=configuration)[0],
+        repeat,
+    )
+    if texts is not None:
+        stages["find_texts"]["words"] = len(texts)
+    table = run_stage(
+        stages,
+        "ocr_table",
+        lambda: ocr_table(configuration, synthetic.image),
+        repeat,
+    )
+    if table is not None:
+        result["accuracy"] = compare_tables(synthetic.table, without_coordinates(table))
+    return result
+
+
+def benchmark_sample(repeat: int):
+    # tasks.py holds the configuration the sample result was produced with
+    sys.path.insert(0, os.getcwd())
+    try:
+        from tasks import sample_table_configuration
+    except ImportError as error:
+        return {"image": SAMPLE_IMAGE, "error": f"{type(error).__name__}: {error}"}
+
+    configuration = sample_table_configuration()
+    configuration.show_pre_ocr_image = False
+    configuration.show_post_recognition_image = False
+    configuration.debug_artifacts = "none"
+    with open(SAMPLE_RESULT, encoding="utf-8") as infile:
+        expected = json.load(infile)
+    stages = {}
+    table = run_stage(
+        stages, "ocr_table", lambda: ocr_table(configuration, SAMPLE_IMAGE), repeat
+    )
+    result = {"image": SAMPLE_IMAGE, "stages": stages}
+    if table is not None:
+        result["accuracy"] = compare_tables(
+            without_coordinates(expected), without_coordinates(table)
+        )
+    return result
+
+
+def environment():
+    info = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "pillow": PIL.__version__,
+        "numpy": np.__version__,
+    }
+    try:
+        import pytesseract
+
+        info["tesseract"] = str(pytesseract.get_tesseract_version())
+    except Exception as error:
+        info["tesseract"] = f"unavailable: {error}"
+    return info
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--output", default="output/benchmark.json")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        choices=sorted(SCENARIOS),
+        help="run only the given scenarios, can be given several times",
+    )
+    parser.add_argument("--rows", type=int, help="run a custom scenario instead")
+    parser.add_argument("--columns", type=int, default=5)
+    parser.add_argument("--font-size", type=int, default=14)
+    parser.add_argument("--noise", type=float, default=0.0)
+    parser.add_argument("--resolution", type=int, nargs=2, metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--skip-ocr", action="store_true", help="skip Tesseract")
+    parser.add_argument("--skip-sample", action="store_true")
+    args = parser.parse_args(argv)
+
+    if args.rows:
+        scenarios = {
+            "custom": {
+                "rows": args.rows,
+                "columns": args.columns,
+                "font_size": args.font_size,
+                "noise": args.noise,
+                "resolution": tuple(args.resolution) if args.resolution else None,
+            }
+        }
+    else:
+        names = args.scenario or list(SCENARIOS)
+        scenarios = {name: SCENARIOS[name] for name in names}
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": environment(),
+        "scenarios": {},
+    }
+    for name, parameters in scenarios.items():
+        print(f"Benchmarking {name}: {parameters}")
+        report["scenarios"][name] = benchmark_scenario(
+            parameters, args.repeat, args.skip_ocr
+        )
+    if not args.skip_ocr and not args.skip_sample:
+        print(f"Benchmarking {SAMPLE_IMAGE}")
+        report["sample"] = benchmark_sample(args.repeat)
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as outfile:
+        json.dump(report, outfile, indent=4)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+"""Synthetic table screenshots with known content for benchmarking."""
+
+import random
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from configuration import TableConfiguration
+
+COLUMNS = [
+    ("Date", "date"),
+    ("Payee", "text"),
+    ("Category", "text"),
+    ("Amount", "amount"),
+    ("Balance", "amount"),
+    ("Memo", "text"),
+    ("Reference", "number"),
+    ("Account", "word"),
+    ("Status", "word"),
+    ("Tag", "word"),
+]
+WORDS = [
+    "Declutter",
+    "Cleaning",
+    "Robocorp",
+    "Baskin",
+    "Robbins",
+    "Cafe",
+    "Service",
+    "Fee",
+    "Food",
+    "Dining",
+    "Restaurants",
+    "Transfer",
+    "Savings",
+    "Checking",
+    "Grocery",
+    "Market",
+    "Fuel",
+    "Station",
+    "Insurance",
+    "Utilities",
+]
+
+
+@dataclass
+class SyntheticTable:
+    image: Image.Image
+    # expected rows of ocr_table without the x and y keys
+    table: List[Dict[str, str]]
+    # word boxes in the format returned by find_texts
+    words: List[Dict]
+    headers: List[str]
+    # finalized column definitions in image coordinates
+    column_definitions: Dict[str, Dict] = field(default_factory=dict)
+    configuration: TableConfiguration = None
+    table_box: Tuple[int, int, int, int] = None
+
+
+def load_font(size: int):
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size)
+    except OSError:
+        return ImageFont.load_default(size=size)
+
+
+def column_names(columns: int):
+    names = [name for name, _ in COLUMNS[:columns]]
+    kinds = [kind for _, kind in COLUMNS[:columns]]
+    for index in range(len(names), columns):
+        names.append(f"Column{index + 1}")
+        kinds.append("word")
+    return names, kinds
+
+
+def cell_value(kind: str, rng: random.Random):
+    if kind == "date":
+        return f"{rng.randint(1, 12)}/{rng.randint(1, 28)}/2023"
+    if kind == "amount":
+        return (
+            f"{rng.choice(['-', ''])}{rng.randint(0, 4999):,}.{rng.randint(0, 99):02}"
+        )
+    if kind == "number":
+        return str(rng.randint(10000, 99999))
+    if kind == "word":
+        return rng.choice(WORDS)
+    return " ".join(rng.sample(WORDS, rng.randint(1, 3)))
+
+
+def generate_table(
+    rows: int = 20,
+    columns: int = 5,
+    font_size: int = 14,
+    noise: float = 0.0,
+    resolution: Tuple[int, int] = None,
+    seed: int = 0,
+):
+    """
+    Renders a table screenshot with known content.
+
+    Arguments:
+    - rows: number of body rows
+    - columns: number of columns
+    - font_size: font size in pixels
+    - noise: standard deviation of gaussian pixel noise relative to 255
+    - resolution: (width, height) of the screenshot, the table is placed in
+      the middle of a window with a toolbar; defaults to the size of the table
+    - seed: seed for the random content
+    """
+    rng = random.Random(seed)
+    font = load_font(font_size)
+    names, kinds = column_names(columns)
+    values = [[cell_value(kind, rng) for kind in kinds] for _ in range(rows)]
+
+    gap = font_size * 2
+    widths = [
+        int(max(font.getlength(text) for text in [name] + [row[i] for row in values]))
+        for i, name in enumerate(names)
+    ]
+    row_height = int(font_size * 1.8)
+    table_width = sum(widths) + gap * (columns + 1)
+    table_height = row_height * (rows + 1) + gap
+    if resolution is None:
+        resolution = (table_width, table_height)
+    width, height = resolution
+    offset_x = max((width - table_width) // 2, 0)
+    offset_y = max((height - table_height) // 2, 0)
+
+    image = Image.new("RGB", (width, height), "white")
+    draw = ImageDraw.Draw(image)
+    if offset_y > row_height * 2:
+        # Toolbar and sidebar of a window around the table
+        draw.rectangle([0, 0, width, row_height * 2], fill=(230, 230, 230))
+        draw.text(
+            (gap, row_height // 2), "File Edit View Reports", font=font, fill="black"
+        )
+    if offset_x > gap * 4:
+        draw.rectangle([0, row_height * 2, gap * 3, height], fill=(240, 240, 240))
+
+    lefts = []
+    x = offset_x + gap
+    for column_width in widths:
+        lefts.append(x)
+        x += column_width + gap
+    words = []
+    table = []
+
+    def draw_text(left, top, text):
+        cursor = left
+        for word in text.split(" "):
+            box = draw.textbbox((cursor, top), word, font=font)
+            draw.text((cursor, top), word, font=font, fill="black")
+            words.append(
+                {
+                    "text": word,
+                    "x": int((box[0] + box[2]) / 2),
+                    "y": int((box[1] + box[3]) / 2),
+                    "left": box[0],
+                    "top": box[1],
+                    "right": box[2],
+                    "bottom": box[3],
+                }
+            )
+            cursor += font.getlength(word + " ")
+
+    header_top = offset_y + gap // 2
+    for name, left in zip(names, lefts):
+        draw_text(left, header_top, name)
+        # Column separators of the grid header
+        separator = left - gap // 2
+        draw.line(
+            [(separator, header_top), (separator, header_top + font_size)],
+            fill=(120, 120, 120),
+            width=max(font_size // 10, 1),
+        )
+    header_bottom = header_top + row_height - font_size // 3
+    draw.line([(offset_x, header_bottom), (x, header_bottom)], fill=(180, 180, 180))
+    for index, row in enumerate(values):
+        top = header_top + row_height * (index + 1)
+        for text, left in zip(row, lefts):
+            draw_text(left, top, text)
+        table.append(dict(zip(names, row)))
+
+    if noise > 0:
+        pixels = np.asarray(image, dtype=np.float32)
+        pixels += np.random.default_rng(seed).normal(0, noise * 255, pixels.shape)
+        image = Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8))
+
+    configuration = TableConfiguration()
+    configuration.headers = list(names)
+    configuration.confidence_level = 0
+    configuration.debug_artifacts = "none"
+    for name, column_width in zip(names, widths):
+        configuration.set_column(name, left=-gap // 2, width=column_width + gap)
+    configuration.set_margins(bottom=0, top=0)
+    column_definitions = {
+        name: {"left": left - gap // 2, "width": column_width + gap}
+        for name, left, column_width in zip(names, lefts, widths)
+    }
+    return SyntheticTable(
+        image=image,
+        table=table,
+        words=words,
+        headers=names,
+        column_definitions=column_definitions,
+        configuration=configuration,
+        table_box=(offset_x, offset_y, offset_x + table_width, offset_y + table_height),
+    )
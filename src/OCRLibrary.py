@@ -1,20 +1,40 @@
+import copy
 import json
 import logging
 import os
-import pytesseract
-from pytesseract import Output
-from typing import Union
-
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from dataclasses import dataclass, replace
+from typing import Iterator, List, Sequence, Union
+
+import numpy as np
 from PIL import ImageGrab, Image, ImageDraw
 
-from RPA.Desktop import Desktop
-from RPA.Windows import Windows
-
-from configuration import TableConfiguration
-from preprocess import preprocess_image
+from artifacts import DEBUG_ARTIFACT_LEVELS, flush_artifacts, submit_artifact
+from cache import cache_key, get_ocr_cache
+from changes import get_change_tracker
+from columns import ColumnIndex
+from configuration import OCRConfiguration, TableConfiguration
+from engine import image_to_data
+from layout import get_layout_cache
+from metrics import OCRMetrics, emit_metrics
+from preprocess import load_image, preprocess_image, resolve_zoom_factor
+from refinement import refine_cells
+from structure import detect_structure
+from table import OCRTable
+from text_index import TextIndex
+from tiling import merge_bands, split_into_bands
+from words import WordRows, WordStore, group_rows
 
 MAX_DISTANCE = 25
 MAX_VERTICAL_VARIANCE = 5
+# Pixels kept around the table body when it is cropped for OCR
+REGION_PADDING = 4
 
 
 def save_image_to_artifacts(image, filename):
@@ -22,6 +42,9 @@ def save_image_to_artifacts(image, filename):
 
 
 def get_element_coordinates(locator: str, image_path: str = None):
+    # Imported here so that the OCR functions can be used without a desktop
+    from RPA.Windows import Windows
+
     windows_library = Windows()
     element = windows_library.get_element(locator)
     element_box = (element.left, element.top, element.right, element.bottom)
@@ -37,64 +60,170 @@ def find_texts(
     image_out: str = None,
     configuration: TableConfiguration = None,
     max_combination_distance=None,
+    metrics: OCRMetrics = None,
+    source: str = None,
 ):
-    tesseract_oem_mode = configuration.tesseract_oem_mode
-    tesseract_psm_mode = configuration.tesseract_psm_mode
-    tesseract_configurations = f" {configuration.tesseract_configurations}"
-    zoom_factor = configuration.zoom_factor
-    # # Initialize variables
-    text_blocks = []
-    current_text = ""
-    start_x, start_y, end_x, end_y = 0, 0, 0, 0
+    """
+    Finds texts from the image with OCR.
+
+    Arguments:
+    - image_in: PIL image or path to the image
+    - image_out: if given the preprocessed image is saved with this name
+    - configuration: details on how OCR should be done
+    - max_combination_distance: if given, texts on the same line within this
+      many pixels horizontally are combined into one text
+    - metrics: collects the timings and counters of the call, the metrics
+      are sent to the metrics sinks when not given
+    - source: name of what the image was captured from, e.g. a window
+      locator. With ``reuse_unchanged_regions`` only the regions that changed
+      since the previous image of the same source are OCR'd
+
+    Returns the found text blocks and the original image.
+    """
+    text_blocks, original_image = _read_texts(
+        image_in, image_out, configuration, max_combination_distance, metrics, source
+    )
+    if isinstance(text_blocks, WordStore):
+        text_blocks = text_blocks.to_dicts()
+    return text_blocks, original_image
 
-    target_image, original_image = preprocess_image(image_in, configuration)
+
+def find_words(
+    image_in: Union[str, Image.Image],
+    image_out: str = None,
+    configuration: TableConfiguration = None,
+    metrics: OCRMetrics = None,
+    source: str = None,
+):
+    """
+    Finds words from the image with OCR like ``find_texts``.
+
+    Returns the words as a ``WordStore`` and the original image.
+    """
+    return _read_texts(image_in, image_out, configuration, None, metrics, source)
+
+
+def _read_texts(
+    image_in, image_out, configuration, max_combination_distance, metrics, source
+):
+    # Words are returned as a WordStore, combined texts as text blocks
+    emit = metrics is None
+    if emit:
+        metrics = OCRMetrics("find_texts")
+    with metrics.stage("load"):
+        original_image = load_image(image_in)
+    if (
+        source is not None
+        and configuration.reuse_unchanged_regions
+        and max_combination_distance is None
+    ):
+
+        def read_texts(region):
+            if region is None:
+                return find_texts(
+                    original_image, image_out, configuration, metrics=metrics
+                )[0]
+            return find_texts_in_region(
+                original_image, region, configuration, metrics=metrics
+            )
+
+        text_blocks = get_change_tracker().find_texts(
+            source, original_image, configuration, read_texts, metrics
+        )
+        if emit:
+            emit_metrics(metrics)
+        return WordStore.from_dicts(text_blocks), original_image
+    zoom_factor = resolve_zoom_factor(original_image, configuration)
+    if zoom_factor != configuration.zoom_factor:
+        configuration = replace(configuration, zoom_factor=zoom_factor)
+    if (
+        configuration.tiled_ocr
+        and max_combination_distance is None
+        and original_image.height > configuration.tile_height
+    ):
+        # The bands share the zoom chosen for the whole image
+        text_blocks = find_texts_in_bands(
+            original_image,
+            replace(configuration, adaptive_zoom=False, tiled_ocr=False),
+            metrics,
+        )
+        if emit:
+            emit_metrics(metrics)
+        return WordStore.from_dicts(text_blocks), original_image
+    target_image, original_image = preprocess_image(
+        original_image, configuration, metrics
+    )
+    metrics.count("ocr_calls")
+    metrics.count("ocr_pixels", target_image.width * target_image.height)
+    if emit:
+        metrics.set("image_width", original_image.width)
+        metrics.set("image_height", original_image.height)
 
     if image_out:
-        save_image_to_artifacts(target_image, image_out)
-
-    custom_config = rf"--oem {tesseract_oem_mode} --psm {tesseract_psm_mode}{tesseract_configurations}"
-    ocr_data = pytesseract.image_to_data(
-        target_image,
-        output_type=Output.DICT,
-        lang=configuration.language,
-        config=custom_config,
+        submit_artifact(save_image_to_artifacts, target_image, image_out)
+
+    cache = get_ocr_cache() if configuration.use_ocr_cache else None
+    if cache is not None:
+        key = cache_key(target_image, configuration, max_combination_distance)
+        cached_blocks = cache.get(key)
+        if cached_blocks is not None:
+            metrics.count("cache_hits")
+            metrics.count("words", len(cached_blocks))
+            if emit:
+                emit_metrics(metrics)
+            if max_combination_distance is None:
+                cached_blocks = WordStore.from_dicts(cached_blocks)
+            return cached_blocks, original_image
+
+    with metrics.stage("tesseract"):
+        ocr_data = image_to_data(target_image, configuration)
+    metrics.record_confidences(
+        conf for text, conf in zip(ocr_data["text"], ocr_data["conf"]) if text.strip()
     )
+    started = time.perf_counter()
 
     if max_combination_distance is None:
-        # Process OCR results
-        for i in range(len(ocr_data["text"])):
-            text = ocr_data["text"][i].strip()
-            if text != "":
-                logging.warning(
-                    f'index {i} text:{ocr_data["text"][i]} left:{ocr_data["left"][i]} conf:{ocr_data["conf"][i]}'
-                )
-            if (
-                text != ""
-                and int(ocr_data["conf"][i]) >= configuration.confidence_level
-            ):  # Conf = confidence of having foud a word. 100 is the max. TODO: make configurable
-                current_text = text
-                start_x, start_y = ocr_data["left"][i], ocr_data["top"][i] - 5
-                end_x, end_y = (
-                    start_x + ocr_data["width"][i],
-                    start_y + ocr_data["height"][i],
-                )
-                middle_x = (start_x + end_x) // 2 / zoom_factor
-                middle_y = (start_y + end_y) // 2 / zoom_factor
-                text_blocks.append(
-                    {
-                        "text": current_text,
-                        "x": int(middle_x),
-                        "y": int(middle_y),
-                        "left": start_x / zoom_factor,
-                        "top": start_y / zoom_factor,  # - 2,
-                        "right": end_x / zoom_factor,
-                        "bottom": end_y / zoom_factor,
-                    }
-                )
-                # if current_text == "XXX":
-                #     logging.warning("\nSTILL DETECTING SINGLE WORD: XXX\n")
-                # elif current_text == "YYY":
-                #     logging.warning("\nSTILL DETECTING SINGLE WORD: YYY\n")
+        text_blocks = WordStore.from_ocr_data(
+            ocr_data, zoom_factor, configuration.confidence_level
+        )
+    else:
+        text_blocks = text_blocks_from_ocr_data(
+            ocr_data, zoom_factor, configuration, max_combination_distance
+        )
+    metrics.add_time("parse", time.perf_counter() - started)
+    metrics.count("words", len(text_blocks))
+    if cache is not None:
+        cache.put(
+            key,
+            (
+                text_blocks.to_dicts()
+                if isinstance(text_blocks, WordStore)
+                else text_blocks
+            ),
+        )
+    if emit:
+        emit_metrics(metrics)
+    return text_blocks, original_image
+
+
+def text_blocks_from_ocr_data(
+    ocr_data, zoom_factor, configuration, max_combination_distance=None
+):
+    """
+    Converts ``image_to_data`` output of an image zoomed by ``zoom_factor``
+    into text blocks in the original image scale.
+    """
+    # # Initialize variables
+    text_blocks = []
+    current_text = ""
+    start_x, start_y, end_x, end_y = 0, 0, 0, 0
+
+    if max_combination_distance is None:
+        words = WordStore.from_ocr_data(
+            ocr_data, zoom_factor, configuration.confidence_level
+        )
+        logging.debug(f"{len(words)} words of {len(ocr_data['text'])} kept")
+        text_blocks = words.to_dicts()
     else:
         # Quick and dirty way to reintroduce combining texts to this function.
 
@@ -147,10 +276,105 @@ def find_texts(
                 }
             )
 
-    return text_blocks, original_image
+    return text_blocks
+
+
+def offset_text_blocks(text_blocks, offset_x, offset_y):
+    """Moves the coordinates of text blocks by the given offsets in place."""
+    for block in text_blocks:
+        for key in ("x", "left", "right"):
+            if key in block:
+                block[key] += offset_x
+        for key in ("y", "top", "bottom"):
+            if key in block:
+                block[key] += offset_y
+    return text_blocks
+
+
+def find_texts_in_region(
+    image: Image.Image,
+    region: tuple,
+    configuration: TableConfiguration,
+    image_out: str = None,
+    metrics: OCRMetrics = None,
+):
+    """
+    OCR only a region of the image.
+
+    Arguments:
+    - image: PIL image
+    - region: (left, top, right, bottom) of the region in image coordinates
+    - configuration: details on how OCR should be done
+    - image_out: if given the preprocessed region is saved with this name
+    - metrics: collects the timings and counters of the call
+
+    Returns the text blocks with coordinates relative to the whole image.
+    """
+    text_blocks, _ = find_texts(
+        image_in=image.crop(region),
+        image_out=image_out,
+        configuration=configuration,
+        metrics=metrics,
+    )
+    return offset_text_blocks(text_blocks, region[0], region[1])
+
+
+def find_words_in_region(
+    image: Image.Image,
+    region: tuple,
+    configuration: TableConfiguration,
+    image_out: str = None,
+    metrics: OCRMetrics = None,
+):
+    """
+    OCR only a region of the image like ``find_texts_in_region``.
+
+    Returns the words as a ``WordStore`` in whole image coordinates.
+    """
+    words, _ = find_words(
+        image_in=image.crop(region),
+        image_out=image_out,
+        configuration=configuration,
+        metrics=metrics,
+    )
+    return words.offset(region[0], region[1])
+
+
+def find_texts_in_bands(
+    image: Image.Image,
+    configuration: TableConfiguration,
+    metrics: OCRMetrics = None,
+):
+    """
+    OCR the image in overlapping horizontal bands in parallel.
+
+    Arguments:
+    - image: PIL image
+    - configuration: details on how OCR should be done, ``tile_height``,
+      ``tile_overlap`` and ``tile_workers`` set how the image is split
+    - metrics: collects the timings and counters of the call
+
+    Returns the text blocks of all bands with duplicates from the overlaps
+    removed.
+    """
+    bands = split_into_bands(
+        image, configuration.tile_height, configuration.tile_overlap
+    )
+    if metrics is not None:
+        metrics.count("bands", len(bands))
+
+    def read_band(band):
+        region = (0, band[0], image.width, band[1])
+        return find_texts_in_region(image, region, configuration, metrics=metrics)
+
+    with ThreadPoolExecutor(max_workers=configuration.tile_workers) as executor:
+        band_texts = list(executor.map(read_band, bands))
+    return merge_bands(bands, band_texts, image.height)
 
 
 def get_window_coordinates(locator: str, image_path: str = None):
+    from RPA.Windows import Windows
+
     window = Windows().control_window(locator)
     window_box = (window.left, window.top, window.right, window.bottom)
     image = ImageGrab.grab(bbox=window_box)
@@ -165,6 +389,7 @@ def find_and_click(
     configuration=None,
     image_path=None,
     max_combination_distance: float = None,
+    max_distance: int = 0,
 ):
     """
     Finds given text from the screen and clicks it
@@ -174,20 +399,29 @@ def find_and_click(
     - configuration: ???
     - image_path: path where to save the window from where to search the text
     - max_combination_distance: If found texts are within this number of pixel horizontally, the texts are considered to be part of same text
+    - max_distance: number of character edits allowed between the search word and the found text
     """
     image, offsets = get_window_coordinates(locator, image_path=image_path)
     texts, image = find_texts(
-        original_target_image=image,
+        image_in=image,
         configuration=configuration,
         image_out=image_path,
         max_combination_distance=max_combination_distance,
+        source=locator,
     )
     result = find_matching(
-        texts, search_word, inclusive=False, case_sensitive=True, offsets=offsets
+        texts,
+        search_word,
+        inclusive=False,
+        case_sensitive=True,
+        offsets=offsets,
+        max_distance=max_distance,
     )
     if result:
+        from RPA.Desktop import Desktop
+
         padding = 5
-        print(f"RESULT: {result}")
+        logging.info(f"RESULT: {result}")
         Desktop().click(result[0]["point"])
         draw = ImageDraw.Draw(image)
         if max_combination_distance is None:
@@ -209,76 +443,85 @@ def find_matching(
     inclusive: bool = False,
     case_sensitive: bool = False,
     offsets: tuple = (0, 0),
+    max_distance: int = 0,
 ):
-    print(f"FINDING MATCH FOR: {search}\n")
+    """
+    Finds the text blocks matching the search.
+
+    Arguments:
+    - texts: text blocks from ``find_texts`` or a ``TextIndex`` of them,
+      pass an index when doing many lookups on the same texts
+    - search: text to look for
+    - inclusive: if True, the search may match a part of the text
+    - case_sensitive: if True, the case of the texts must match
+    - offsets: added to the coordinates of the returned points
+    - max_distance: number of character edits allowed, to match texts with
+      OCR errors
+
+    Returns the matches with the fewest edits first, in reading order.
+    """
+    logging.debug(f"FINDING MATCH FOR: {search}")
+    if not isinstance(texts, TextIndex) or texts.case_sensitive != case_sensitive:
+        texts = TextIndex(
+            texts.blocks if isinstance(texts, TextIndex) else texts, case_sensitive
+        )
     matches = []
-    for text in texts:
-        logging.warning(text)
-        search = search if case_sensitive else search.lower()
-        image_text = text["text"] if case_sensitive else text["text"].lower()
-        image_text = image_text.strip()
-        if inclusive and search in image_text:
-            matches.append(
-                {
-                    "text": text["text"],
-                    "point": f"point:{int(text['x'])+offsets[0]},{int(text['y'])+offsets[1]}",
-                    "match": text,
-                }
-            )
-        elif not inclusive and search == image_text:
-            matches.append(
-                {
-                    "text": text["text"],
-                    "point": f"point:{int(text['x'])+offsets[0]},{int(text['y'])+offsets[1]}",
-                    "match": text,
-                }
-            )
+    for match in texts.find(search, inclusive=inclusive, max_distance=max_distance):
+        text = match["block"]
+        matches.append(
+            {
+                "text": text["text"],
+                "point": f"point:{int(text['x'])+offsets[0]},{int(text['y'])+offsets[1]}",
+                "match": text,
+                "distance": match["distance"],
+            }
+        )
     return matches
 
 
-def combine_by_top_range(dicts):
+def combine_by_top_range(dicts, tolerance: int = 8, top_offset: int = 4):
     """
     Takes the read OCR table data as input and then determines, which individual found words
     are on the same row. This is determined based on the top (y) coordinate of each found word.
 
-    A word is considered to be start of a new row if the top value of the word
-    is not within 8 pixels (abs) of the top row of any existing rows.
+    The words are sorted by their top value and swept once, a row at a time
+    with array operations, see ``words.group_rows``. A word is considered
+    to be start of a new row if its top value is more than ``tolerance`` pixels
+    below the top value of the first word of the current row.
 
-    Returns a dictionary where each key is top coordtinate of a row.
+    Returns a dictionary where each key is top coordtinate of a row
+    (top of its first word minus ``top_offset``).
     Under each of these keys are the words as a list that make the row.
     Each word is in the same format as it was in the input.
 
     The returned dictionary is ordered based on y values.
     The list of words for each key is ordered based on x value.
-    """
-    combined = {}
-    for d in dicts:
-        top_value = d["top"] - 4
-        found = False
-        for key in combined:
-            if abs(top_value - key) <= 8:  # This should be made a parameter.
-                # Adding the word to existing row
-                combined[key].append(d)
-                found = True
-                break
-        if not found:
-            # Creating key to row dictionary with top value of the word as the key.
-            combined[top_value] = [d]
 
-    # Sort each list within the combined dictionary based on 'left' values
-    for key in combined:
-        combined[key].sort(key=lambda x: x["left"])
-
-    # Sort the combined dictionary by its keys (the 'top' values)
-    return dict(sorted(combined.items()))
+    Words given as a ``WordStore`` stay in the store and the rows are returned
+    as ``WordRows``, which maps the row tops to text blocks the same way.
+    """
+    if isinstance(dicts, WordStore):
+        return dicts.rows(tolerance, top_offset)
+    dicts = list(dicts)
+    tops = np.fromiter((d["top"] for d in dicts), dtype=np.float64, count=len(dicts))
+    lefts = np.fromiter((d["left"] for d in dicts), dtype=np.float64, count=len(dicts))
+    return {
+        row_top: [dicts[index] for index in indexes]
+        for row_top, indexes in group_rows(tops, lefts, tolerance, top_offset)
+    }
 
 
 def find_header_row(rows, header_texts):
-    for key, val in rows.items():
-        # logging.warning(f"key: {key} val: {val}")
+    if isinstance(rows, WordRows):
+        # Only the texts are needed until the header row is found
+        candidates = rows.row_texts()
+    else:
+        candidates = (
+            (key, [item["text"] for item in val]) for key, val in rows.items()
+        )
+    for key, row_texts in candidates:
         # Check if all header texts are in the 'text' key of the row
-        row_texts = [item["text"] for item in val]
-        logging.warning(f"row_texts: {row_texts}")
+        logging.debug(f"row_texts: {row_texts}")
         if all(item in row_texts for item in header_texts):
 
             # Making sure that the row only contains the given headers!
@@ -293,7 +536,7 @@ def find_header_row(rows, header_texts):
                 else:
                     # The row contains (and only contains wanted headers and the length of row is larger than 1)
                     # We shall assume thatthis is the header row
-                    return key, val
+                    return key, rows[key]
     return None, None
 
 
@@ -305,13 +548,14 @@ def get_item_attribute(items, target_text, attribute):
     return None
 
 
-def determine_column(header, column_definitions):
-    for col_name, col_def in column_definitions.items():
-        if header["left"] >= col_def["left"] and header["right"] <= (
-            col_def["left"] + col_def["width"]
-        ):
-            return col_name
-    return None
+def determine_column(header, column_definitions, mode: str = "contained"):
+    """
+    Returns the name of the column of a word, or None. Pass a ``ColumnIndex``
+    of the column definitions when placing many words into the same columns.
+    """
+    if not isinstance(column_definitions, ColumnIndex):
+        column_definitions = ColumnIndex(column_definitions)
+    return column_definitions.assign(header["left"], header["right"], mode)
 
 
 def calculate_column_definitions(configuration, header):
@@ -323,7 +567,7 @@ def calculate_column_definitions(configuration, header):
         if "fixed" in val["left"]:
             result[key]["left"] = val["left"]["fixed"]
         elif "mod" in val["left"]:
-            logging.warning(f"KEY: {key}")
+            logging.debug(f"KEY: {key}")
             result[key]["left"] = (
                 get_item_attribute(header, key, "left") + val["left"]["mod"]
             )
@@ -336,7 +580,170 @@ def calculate_column_definitions(configuration, header):
     return result
 
 
-def draw_post_recognition_image(image, configuration, data, header, column_definitions):
+def locate_header(rows, configuration, metrics: OCRMetrics = None):
+    """
+    Finds the header row and finalizes the column definitions against it.
+
+    Returns the top of the header row, its words and the column definitions.
+    """
+    metrics = metrics or OCRMetrics("locate_header")
+    with metrics.stage("header_search"):
+        top, header = find_header_row(rows, configuration.headers)
+        if top is None or header is None:
+            raise ValueError(
+                f"Could not find header row with texts: {configuration.headers}"
+            )
+        else:
+            logging.debug(f"HEADER {top} = {header}")
+        column_definitions = calculate_column_definitions(configuration, header)
+    logging.debug(
+        f"\n\nFINALIZED COLUMN DEFINITIONS\n{'-'*40}\n{json.dumps(column_definitions, indent=4)}\n\n"
+    )
+    return top, header, column_definitions
+
+
+def get_table_region(image, configuration, header, column_definitions):
+    """
+    Returns (left, top, right, bottom) of the table body: below the header row,
+    within the column definitions and the top margin.
+    """
+    left = min(col["left"] for col in column_definitions.values()) - REGION_PADDING
+    right = max(col["left"] + col["width"] for col in column_definitions.values())
+    top = header[0]["bottom"] + configuration.margins.get("top", 0) - REGION_PADDING
+    return (
+        max(int(left), 0),
+        max(int(top), 0),
+        min(int(right) + REGION_PADDING, image.width),
+        image.height,
+    )
+
+
+def read_table_header(image_in, configuration, metrics: OCRMetrics = None):
+    """
+    Reads the whole image at ``header_zoom_factor`` to find the header row
+    and the column definitions.
+
+    Returns the original image, the header row words and the column definitions.
+    """
+    header_configuration = replace(
+        configuration,
+        zoom_factor=configuration.header_zoom_factor,
+        adaptive_zoom=False,
+        show_pre_ocr_image=False,
+    )
+    metrics = metrics or OCRMetrics("read_table_header")
+    data, image = find_words(
+        image_in=image_in, configuration=header_configuration, metrics=metrics
+    )
+    with metrics.stage("row_grouping"):
+        data = combine_by_top_range(data, tolerance=configuration.row_tolerance)
+    _, header, column_definitions = locate_header(data, configuration, metrics)
+    return image, header, column_definitions
+
+
+def read_table_body(
+    image,
+    configuration,
+    header,
+    column_definitions,
+    image_out=None,
+    metrics: OCRMetrics = None,
+):
+    """
+    Reads only the table body below the header at ``zoom_factor``.
+
+    Returns the body rows in original image coordinates.
+    """
+    metrics = metrics or OCRMetrics("read_table_body")
+    region = get_table_region(image, configuration, header, column_definitions)
+    data = find_words_in_region(
+        image, region, configuration, image_out=image_out, metrics=metrics
+    )
+    with metrics.stage("row_grouping"):
+        return combine_by_top_range(data, tolerance=configuration.row_tolerance)
+
+
+def find_known_layout(image, configuration, metrics: OCRMetrics = None):
+    """
+    Looks up the layout of the image from the layout cache.
+
+    A cached layout is used only if the header texts are found again by
+    OCR of its header band.
+
+    Returns the header row words and the column definitions, or None.
+    """
+    metrics = metrics or OCRMetrics("find_known_layout")
+    check_configuration = replace(
+        configuration,
+        adaptive_zoom=False,
+        show_pre_ocr_image=False,
+        tiled_ocr=False,
+        reuse_unchanged_regions=False,
+    )
+    with metrics.stage("layout_lookup"):
+        layout = get_layout_cache().lookup(
+            image,
+            configuration,
+            lambda region: find_texts_in_region(
+                image, region, check_configuration, metrics=metrics
+            ),
+        )
+    metrics.count("layout_cache_hits" if layout else "layout_cache_misses")
+    return layout
+
+
+def get_column_configuration(configuration, column_name):
+    """Returns the configuration for OCR of a single column."""
+    settings = dict(configuration.column_ocr_settings.get(column_name, {}))
+    whitelist = settings.pop("whitelist", None)
+    if whitelist:
+        settings["tesseract_configurations"] = (
+            f"{configuration.tesseract_configurations} "
+            f"-c tessedit_char_whitelist={whitelist}"
+        ).strip()
+    return replace(configuration, show_pre_ocr_image=False, **settings)
+
+
+def read_table_columns(
+    image, configuration, header, column_definitions, metrics: OCRMetrics = None
+):
+    """
+    Reads each column of the table body as its own OCR job in parallel.
+
+    Every column is OCR'd with the settings given for it with
+    ``TableConfiguration.set_column_ocr``. The words are tagged with
+    the name of their column under the key ``column``.
+
+    Returns the body rows in original image coordinates.
+    """
+    metrics = metrics or OCRMetrics("read_table_columns")
+    _, top, _, bottom = get_table_region(
+        image, configuration, header, column_definitions
+    )
+    jobs = {}
+    with ThreadPoolExecutor(max_workers=configuration.column_ocr_workers) as executor:
+        for column_name, column in column_definitions.items():
+            left = max(int(column["left"]), 0)
+            right = min(int(column["left"] + column["width"]), image.width)
+            if right <= left:
+                continue
+            jobs[column_name] = executor.submit(
+                find_words_in_region,
+                image,
+                (left, top, right, bottom),
+                get_column_configuration(configuration, column_name),
+                metrics=metrics,
+            )
+    data = WordStore.concatenate(
+        [job.result().tag_column(column_name) for column_name, job in jobs.items()]
+    )
+    with metrics.stage("row_grouping"):
+        return combine_by_top_range(data, tolerance=configuration.row_tolerance)
+
+
+def draw_post_recognition_image(
+    image, configuration, data, header, column_definitions, crop_columns=True
+):
     original_image = image.copy()
     draw = ImageDraw.Draw(image)
 
@@ -367,7 +774,7 @@ def draw_post_recognition_image(image, configuration, data, header, column_defin
         right = left + width
         column_definitions[key]["right"] = right
 
-        if key in configuration.column_to_crop:
+        if crop_columns and key in configuration.column_to_crop:
             cropped_image = original_image.crop((left, table_top, right, table_bottom))
             save_image_to_artifacts(cropped_image, f"column_{key.lower()}.png")
         # Draw vertical red lines
@@ -387,94 +794,599 @@ def draw_post_recognition_image(image, configuration, data, header, column_defin
     return draw, overlay, table_top, table_bottom
 
 
-def ocr_table(
-    configuration: TableConfiguration,
-    image_in: Union[str, Image.Image] = None,
-    result_json: str = None,
+def build_table(
+    data,
+    column_definitions,
+    configuration,
+    table_top,
+    table_bottom,
+    points=None,
+    cells=None,
 ):
     """
-    Read table with OCR as specified in the given configuration.
+    Constructs the table from words grouped into rows.
+
+    Words above ``table_top`` plus the top margin and below ``table_bottom``
+    plus the bottom margin are left out. Every row gets a clickable point as
+    keys x and y, and columns without words get empty values.
 
     Arguments:
-    - configuration: details on how OCR should be done
-    - image_in: PIL image or path to the image.
-    - result_json: if given the result JSON will be written into this file
+    - data: rows as returned by ``combine_by_top_range``, the words of
+      ``WordRows`` are assigned to the columns without making dicts of them
+    - column_definitions: finalized column definitions
+    - configuration: table configuration
+    - table_top: bottom of the header row
+    - table_bottom: bottom of the image
+    - points: if given, the centers of the words placed into the table
+      are appended to this list
+    - cells: if given, the words of every table row are appended to this
+      list as a dict by column name
     """
-    logging.warning(f"CONFIGURATION: {configuration}")
     table = []
-    headers = configuration.headers
     top_margin = configuration.margins["top"]
     bottom_margin = configuration.margins["bottom"]
-
-    data, image = find_texts(
-        image_in=image_in,
-        configuration=configuration,
-        image_out="preprocessed_image_for_tesseract.png",
-    )
-    data = combine_by_top_range(data)
-    top, header = find_header_row(data, headers)
-    if top is None or header is None:
-        raise ValueError(f"Could not find header row with texts: {headers}")
-    else:
-        print(f"\nHEADER {top} = {header}")
-    column_definitions = calculate_column_definitions(configuration, header)
-    logging.warning(
-        f"\n\nFINALIZED COLUMN DEFINITIONS\n{'-'*40}\n{json.dumps(column_definitions, indent=4)}\n\n"
+    if not isinstance(data, WordRows):
+        starts = np.cumsum([0] + [len(row) for row in data.values()])
+        words = WordStore.from_dicts([word for row in data.values() for word in row])
+        data = WordRows(words, list(data), starts)
+    words = data.store
+    if not len(words):
+        return table
+    assigned = words.assign_columns(
+        ColumnIndex(column_definitions), configuration.column_assignment
     )
-    draw, overlay, table_top, table_bottom = draw_post_recognition_image(
-        image, configuration, data, header, column_definitions
-    )
-    # Construct table
-    for _, row in data.items():
+    if words.columns is not None:
+        # Words read by column OCR already know their column
+        assigned = [
+            column or name for column, name in zip(words.columns.tolist(), assigned)
+        ]
+    boxes = words.boxes
+    above = (boxes["top"] < table_top + top_margin).tolist()
+    below = (boxes["bottom"] > table_bottom + bottom_margin).tolist()
+    texts = words.texts.tolist()
+    xs = boxes["x"].tolist()
+    ys = boxes["y"].tolist()
+    starts = data.starts.tolist()
+    row_starts = data.starts[:-1]
+    lefts = np.minimum.reduceat(boxes["left"], row_starts).tolist()
+    tops = np.minimum.reduceat(boxes["top"], row_starts).tolist()
+    rights = np.maximum.reduceat(boxes["right"], row_starts).tolist()
+    bottoms = np.maximum.reduceat(boxes["bottom"], row_starts).tolist()
+    for index in range(len(data)):
         table_row = {}
-        for column in row:
-            if column["top"] < (table_top + top_margin):
+        row_cells = {}
+        for position in range(starts[index], starts[index + 1]):
+            if above[position]:
                 continue
-            if column["bottom"] > (table_bottom + bottom_margin):
+            if below[position]:
                 break
-            column_name = determine_column(column, column_definitions)
+            column_name = assigned[position]
             if column_name:
                 if column_name in table_row.keys():
-                    table_row[column_name] += " " + column["text"]
+                    table_row[column_name] += " " + texts[position]
                 else:
-                    table_row[column_name] = column["text"]
-                # Draw a black dot
-                radius = 3
-                left_up_point = (column["x"] - radius, column["y"] - radius)
-                right_down_point = (column["x"] + radius, column["y"] + radius)
-                draw.ellipse([left_up_point, right_down_point], fill="black")
-
-            print(f"column_name:{column_name} column_text:{column['text']}")
+                    table_row[column_name] = texts[position]
+                if points is not None:
+                    points.append((xs[position], ys[position]))
+                if cells is not None:
+                    row_cells.setdefault(column_name, []).append(position)
 
         if len(table_row.keys()) > 0:
             # Adding the row to the table to be returned
             # and adding a clickable point for it as keys x and y
-            smallest_left = min(row, key=lambda x: x["left"])["left"]
-            largest_right = max(row, key=lambda x: x["right"])["right"]
-            smallest_top = min(row, key=lambda x: x["top"])["top"]
-            largest_bottom = max(row, key=lambda x: x["bottom"])["bottom"]
-            table_row["x"] = int((smallest_left + largest_right) / 2)
-            table_row["y"] = int((smallest_top + largest_bottom) / 2)
+            table_row["x"] = int((lefts[index] + rights[index]) / 2)
+            table_row["y"] = int((tops[index] + bottoms[index]) / 2)
             table.append(table_row)
+            if cells is not None:
+                cells.append(
+                    {
+                        name: words.select(positions).to_dicts()
+                        for name, positions in row_cells.items()
+                    }
+                )
 
     # Add empty values for columns that were not found
     for row in table:
         for key in column_definitions.keys():
             row.setdefault(key, "")
+    return table
+
+
+def render_table_image(
+    image, configuration, data, header, column_definitions, points, crop_columns=True
+):
+    """
+    Draws the identified rows, columns and words on the image, saves it as an
+    artifact and shows it if configured to.
+
+    The image is drawn on, pass a copy if the original is still needed.
+    """
+    draw, overlay, _, _ = draw_post_recognition_image(
+        image, configuration, data, header, column_definitions, crop_columns
+    )
+    for x, y in points:
+        # Draw a black dot
+        radius = 3
+        draw.ellipse([(x - radius, y - radius), (x + radius, y + radius)], fill="black")
     # Merge overlay with the original image
     combined = Image.alpha_composite(image.convert("RGBA"), overlay)
     if configuration.show_post_recognition_image:
         combined.show()
-    save_image_to_artifacts(combined, "table_rows_and_columns_identified.png")
+    if configuration.debug_artifacts != "none":
+        save_image_to_artifacts(combined, "table_rows_and_columns_identified.png")
 
-    print(f"\nCOLUMN DEFINITIONS:\n{json.dumps(column_definitions, indent=4)}\n")
+
+def read_cell(image, box, configuration, column_name, variant, metrics=None):
+    """
+    OCR a single table cell with the settings of its column and the
+    configuration overrides of a refinement variant.
+
+    The reads are counted as ``refine_calls`` and ``refined_words`` so that
+    they do not add to the OCR counters of the table itself.
+    """
+    cell_configuration = replace(
+        get_column_configuration(configuration, column_name),
+        adaptive_zoom=False,
+        tiled_ocr=False,
+        **variant,
+    )
+    cell_metrics = OCRMetrics("read_cell")
+    words = find_texts_in_region(image, box, cell_configuration, metrics=cell_metrics)
+    if metrics is not None:
+        metrics.count("refine_calls", cell_metrics.counters.get("ocr_calls", 0))
+        metrics.count("refined_words", len(words))
+    return words
+
+
+def preprocessed_image_name(configuration):
+    """Returns the artifact name for the preprocessed image if it is saved."""
+    if configuration.debug_artifacts not in DEBUG_ARTIFACT_LEVELS:
+        raise ValueError(
+            f"Unknown debug artifact level: {configuration.debug_artifacts}. "
+            f"Expected one of {DEBUG_ARTIFACT_LEVELS}"
+        )
+    if configuration.debug_artifacts == "full":
+        return "preprocessed_image_for_tesseract.png"
+    return None
+
+
+def complete_table(
+    configuration, image, data, header, column_definitions, metrics, result_json
+):
+    """
+    Builds the table from the rows, reads doubtful cells again with
+    ``refine_low_confidence``, renders debug images and writes JSON.
+
+    Returns the table rows as a list of dicts.
+    """
+    points = []
+    assignment_started = time.perf_counter()
+    for column in column_definitions.values():
+        column["right"] = column["left"] + column["width"]
+    cells = [] if configuration.refine_low_confidence else None
+    rows = build_table(
+        data,
+        column_definitions,
+        configuration,
+        table_top=header[0]["bottom"],
+        table_bottom=image.height,
+        points=points,
+        cells=cells,
+    )
+    metrics.add_time("column_assignment", time.perf_counter() - assignment_started)
+    if configuration.refine_low_confidence:
+        with metrics.stage("refinement"):
+            refine_cells(
+                image.size,
+                rows,
+                cells,
+                column_definitions,
+                configuration,
+                lambda box, column_name, variant: read_cell(
+                    image, box, configuration, column_name, variant, metrics
+                ),
+                metrics,
+            )
+    metrics.set("image_width", image.width)
+    metrics.set("image_height", image.height)
+    metrics.set("rows", len(data))
+    metrics.set("table_rows", len(rows))
+    if (
+        configuration.debug_artifacts != "none"
+        or configuration.show_post_recognition_image
+    ):
+        # Rendering runs in the background on copies of the inputs,
+        # the stage only measures the time spent on the calling thread
+        with metrics.stage("rendering"):
+            submit_artifact(
+                render_table_image,
+                image.copy(),
+                configuration,
+                data,
+                header,
+                copy.deepcopy(column_definitions),
+                points,
+                crop_columns=configuration.debug_artifacts == "full",
+            )
+
+    logging.debug(f"COLUMN DEFINITIONS:\n{json.dumps(column_definitions, indent=4)}")
 
     if result_json:
-        with open(result_json, "w", encoding="utf-8") as outfile:
-            json.dump(table, outfile, ensure_ascii=False, indent=4)
+        with metrics.stage("json_write"):
+            with open(result_json, "w", encoding="utf-8") as outfile:
+                json.dump(rows, outfile, ensure_ascii=False, indent=4)
+    return rows
+
+
+def ocr_table(
+    configuration: TableConfiguration,
+    image_in: Union[str, Image.Image] = None,
+    result_json: str = None,
+    return_metrics: bool = False,
+    source: str = None,
+    as_table: bool = False,
+):
+    """
+    Read table with OCR as specified in the given configuration.
+
+    Arguments:
+    - configuration: details on how OCR should be done
+    - image_in: PIL image or path to the image.
+    - result_json: if given the result JSON will be written into this file
+    - return_metrics: if True, the timings and counters of the call are
+      returned with the table as an ``OCRMetrics`` object
+    - source: name of what the image was captured from, defaults to the
+      image path. With ``reuse_unchanged_regions`` only the regions that
+      changed since the previous image of the source are OCR'd
+    - as_table: if True, the rows are returned as an ``OCRTable``, which
+      supports indexed lookups of rows but whose rows are read-only copies
+
+    Returns the rows as a list of dicts, each with the center of the row as
+    keys x and y.
+
+    The metrics are also sent to the sinks added with ``add_metrics_sink``.
+    """
+    started = time.perf_counter()
+    metrics = OCRMetrics("ocr_table")
+    logging.debug(f"CONFIGURATION: {configuration}")
+    preprocessed_image_out = preprocessed_image_name(configuration)
+    source = source or (image_in if isinstance(image_in, str) else None)
+
+    layout = None
+    if configuration.use_layout_cache:
+        with metrics.stage("load"):
+            image_in = image = load_image(image_in)
+        layout = find_known_layout(image, configuration, metrics)
+    if layout is not None:
+        header, column_definitions = layout
+        if configuration.column_ocr:
+            data = read_table_columns(
+                image, configuration, header, column_definitions, metrics
+            )
+        else:
+            data = read_table_body(
+                image,
+                configuration,
+                header,
+                column_definitions,
+                image_out=preprocessed_image_out,
+                metrics=metrics,
+            )
+    elif configuration.region_of_interest or configuration.column_ocr:
+        image, header, column_definitions = read_table_header(
+            image_in, configuration, metrics
+        )
+        if configuration.column_ocr:
+            data = read_table_columns(
+                image, configuration, header, column_definitions, metrics
+            )
+        else:
+            data = read_table_body(
+                image,
+                configuration,
+                header,
+                column_definitions,
+                image_out=preprocessed_image_out,
+                metrics=metrics,
+            )
+    else:
+        data, image = find_words(
+            image_in=image_in,
+            configuration=configuration,
+            image_out=preprocessed_image_out,
+            metrics=metrics,
+            source=source,
+        )
+        with metrics.stage("row_grouping"):
+            data = combine_by_top_range(data, tolerance=configuration.row_tolerance)
+        _, header, column_definitions = locate_header(data, configuration, metrics)
+    if configuration.use_layout_cache and layout is None:
+        get_layout_cache().store(image, configuration, header, column_definitions)
+    table = complete_table(
+        configuration, image, data, header, column_definitions, metrics, result_json
+    )
+    if as_table:
+        table = OCRTable(table, columns=[*column_definitions, "x", "y"])
+    metrics.add_time("total", time.perf_counter() - started)
+    emit_metrics(metrics)
+    if return_metrics:
+        return table, metrics
     return table
 
 
+def read_structure_cells(image, structure, configuration, metrics: OCRMetrics = None):
+    """
+    Reads the texts of the table cells found by ``detect_structure``.
+
+    With ``structure_cell_ocr`` every cell with ink is OCR'd as its own job,
+    ``structure_workers`` at a time. Otherwise the table is OCR'd once and
+    the words are placed into the cells containing their centers.
+
+    Returns the texts by (row index, column index).
+    """
+    metrics = metrics or OCRMetrics("read_structure_cells")
+    configuration = replace(configuration, tiled_ocr=False)
+    texts = {}
+    if configuration.structure_cell_ocr:
+        cells = list(structure.cell_boxes())
+        metrics.count("cells", len(cells))
+        with ThreadPoolExecutor(
+            max_workers=configuration.structure_workers
+        ) as executor:
+            cell_words = executor.map(
+                lambda cell: find_texts_in_region(
+                    image, cell[2], configuration, metrics=metrics
+                ),
+                cells,
+            )
+            for (row_index, column_index, _), words in zip(cells, cell_words):
+                texts[row_index, column_index] = " ".join(
+                    word["text"] for word in words
+                )
+        return texts
+    left = structure.padded_columns[0][0]
+    right = structure.padded_columns[-1][1]
+    top = structure.padded_rows[0][0]
+    bottom = structure.padded_rows[-1][1]
+    words = find_texts_in_region(
+        image, (left, top, right, bottom), configuration, metrics=metrics
+    )
+    rows, columns = structure.locate(
+        [word["x"] for word in words], [word["y"] for word in words]
+    )
+    for word, row_index, column_index in zip(words, rows.tolist(), columns.tolist()):
+        if row_index < 0 or column_index < 0:
+            continue
+        key = (row_index, column_index)
+        texts[key] = f"{texts[key]} {word['text']}" if key in texts else word["text"]
+    return texts
+
+
+def ocr_table_by_structure(
+    configuration: TableConfiguration,
+    image_in: Union[str, Image.Image] = None,
+    result_json: str = None,
+    return_metrics: bool = False,
+    as_table: bool = False,
+):
+    """
+    Read table by its ruling lines and blank gutters instead of header words.
+
+    The row bands and column boundaries are found from the preprocessed image
+    before OCR, see ``structure.detect_structure``. The table is OCR'd once
+    and its words are placed into the cells, or with ``structure_cell_ocr``
+    only the cells with ink are read one by one. Column definitions are not
+    needed. When ``headers`` are configured, the first row containing all of
+    them names its columns and it is left out with the rows above it. Other
+    columns are named ``column_1``, ``column_2`` and so on.
+
+    Arguments:
+    - configuration: details on how OCR should be done
+    - image_in: PIL image or path to the image.
+    - result_json: if given the result JSON will be written into this file
+    - return_metrics: if True, the timings and counters of the call are
+      returned with the table as an ``OCRMetrics`` object
+    - as_table: if True, the rows are returned as an ``OCRTable``
+
+    Returns the rows as a list of dicts with the center of every row as
+    keys x and y.
+    """
+    started = time.perf_counter()
+    metrics = OCRMetrics("ocr_table_by_structure")
+    with metrics.stage("load"):
+        image = load_image(image_in)
+    with metrics.stage("structure"):
+        structure = detect_structure(image, configuration)
+    metrics.set("image_width", image.width)
+    metrics.set("image_height", image.height)
+    metrics.set("rows", len(structure.rows))
+    texts = {}
+    if structure.rows:
+        texts = read_structure_cells(image, structure, configuration, metrics)
+    grid = [
+        [texts.get((row, column), "") for column in range(len(structure.columns))]
+        for row in range(len(structure.rows))
+    ]
+    names = [f"column_{index + 1}" for index in range(len(structure.columns))]
+    first_row = 0
+    if configuration.headers:
+        for index, cells in enumerate(grid):
+            if all(header in cells for header in configuration.headers):
+                names = [
+                    text if text in configuration.headers else name
+                    for text, name in zip(cells, names)
+                ]
+                first_row = index + 1
+                break
+        else:
+            logging.warning(
+                f"Could not find header row with texts: {configuration.headers}"
+            )
+    rows = []
+    for index in range(first_row, len(grid)):
+        if not any(grid[index]):
+            continue
+        row = dict(zip(names, grid[index]))
+        columns = np.flatnonzero(structure.ink[index])
+        top, bottom = structure.rows[index]
+        row["x"] = int(
+            (structure.columns[columns[0]][0] + structure.columns[columns[-1]][1]) / 2
+        )
+        row["y"] = int((top + bottom) / 2)
+        rows.append(row)
+    metrics.set("table_rows", len(rows))
+    if result_json:
+        with metrics.stage("json_write"):
+            with open(result_json, "w", encoding="utf-8") as outfile:
+                json.dump(rows, outfile, ensure_ascii=False, indent=4)
+    table = OCRTable(rows, columns=[*names, "x", "y"]) if as_table else rows
+    metrics.add_time("total", time.perf_counter() - started)
+    emit_metrics(metrics)
+    if return_metrics:
+        return table, metrics
+    return table
+
+
+@dataclass
+class TableResult:
+    """Result of reading one image in a batch.
+
+    ``table`` is set when the table was read and ``error`` when it failed.
+    """
+
+    index: int
+    source: str = None
+    table: list = None
+    error: Exception = None
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _ocr_table_job(index, configuration, image_in):
+    source = image_in if isinstance(image_in, str) else None
+    try:
+        return TableResult(index, source, table=ocr_table(configuration, image_in))
+    except Exception as error:  # reported per image, the batch continues
+        return TableResult(index, source, error=error)
+    finally:
+        # Worker processes exit without running atexit handlers
+        flush_artifacts()
+
+
+def _batch_configurations(images, configuration, debug_artifacts=False):
+    if isinstance(configuration, OCRConfiguration):
+        configurations = [configuration] * len(images)
+    else:
+        configurations = list(configuration)
+    if len(configurations) != len(images):
+        raise ValueError(
+            f"Got {len(configurations)} configurations for {len(images)} images"
+        )
+    result = []
+    for conf in configurations:
+        # Worker processes must not open image viewers
+        conf = conf.clone()
+        conf.show_pre_ocr_image = False
+        conf.show_post_recognition_image = False
+        if not debug_artifacts:
+            # The workers would overwrite each other's artifact files
+            conf.debug_artifacts = "none"
+        result.append(conf)
+    return result
+
+
+def iter_ocr_tables(
+    images: Sequence[Union[str, Image.Image]],
+    configuration: Union[TableConfiguration, Sequence[TableConfiguration]],
+    max_workers: int = None,
+    ordered: bool = False,
+    debug_artifacts: bool = False,
+) -> Iterator[TableResult]:
+    """
+    Read tables from many images in parallel worker processes.
+
+    Yields a ``TableResult`` for each image, as soon as it completes or,
+    with ``ordered``, in the order of the given images. A failing image
+    is reported in its result and does not stop the batch.
+
+    Arguments:
+    - images: PIL images or paths to the images
+    - configuration: one configuration shared by all images or one per image
+    - max_workers: number of worker processes, defaults to the number of CPUs
+    - ordered: yield results in the order of the images
+    - debug_artifacts: keep the ``debug_artifacts`` level of the
+      configurations, by default the workers write no debug images. The
+      images of all workers are written with the same file names
+    """
+    images = list(images)
+    configurations = _batch_configurations(images, configuration, debug_artifacts)
+    max_workers = max_workers or os.cpu_count() or 1
+    # Images are submitted lazily so that a large batch is not pickled at once
+    max_in_flight = max_workers * 2
+    pending = {}
+    ready = {}
+    next_index = 0
+
+    def collect(done):
+        for future in done:
+            index = pending.pop(future)
+            try:
+                ready[index] = future.result()
+            except Exception as error:  # e.g. a crashed worker process
+                source = images[index] if isinstance(images[index], str) else None
+                ready[index] = TableResult(index, source, error=error)
+
+    def release(next_index):
+        if not ordered:
+            results = [ready.pop(index) for index in list(ready)]
+            return results, next_index
+        results = []
+        while next_index in ready:
+            results.append(ready.pop(next_index))
+            next_index += 1
+        return results, next_index
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for index, (image_in, conf) in enumerate(zip(images, configurations)):
+            future = executor.submit(_ocr_table_job, index, conf, image_in)
+            pending[future] = index
+            if len(pending) >= max_in_flight:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+                results, next_index = release(next_index)
+                yield from results
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            collect(done)
+            results, next_index = release(next_index)
+            yield from results
+
+
+def ocr_tables(
+    images: Sequence[Union[str, Image.Image]],
+    configuration: Union[TableConfiguration, Sequence[TableConfiguration]],
+    max_workers: int = None,
+    debug_artifacts: bool = False,
+) -> List[TableResult]:
+    """
+    Read tables from many images in parallel worker processes.
+
+    Returns a ``TableResult`` for each image in the order of the images.
+    See ``iter_ocr_tables`` for the arguments.
+    """
+    return list(
+        iter_ocr_tables(
+            images,
+            configuration,
+            max_workers=max_workers,
+            ordered=True,
+            debug_artifacts=debug_artifacts,
+        )
+    )
+
+
 def get_locator_for_clicking_row_of_the_read_table(table, wanted_items_on_row):
     """
     Returns X and Y coordinates for clicking of the row as a string of format:
@@ -488,20 +1400,35 @@ def get_locator_for_clicking_row_of_the_read_table(table, wanted_items_on_row):
 
 def get_row_from_read_ocr_table(table, wanted_items_on_row):
     """
-    Returns the first matching row from read ocr table.
+    Returns the first row from read ocr table that has all the wanted items.
+    A list of rows is scanned in order, an ``OCRTable`` is looked up by its
+    column indexes.
     Arguments:
     wanted_items_on_row: dictionary with keys and values
     representing the data that the row must contain on each row.
     Each key represents the column
     and each value represents wanted value in that column
     """
-    for row in table:
-        for key in wanted_items_on_row.keys():
-            if key in row.keys() and row[key] == wanted_items_on_row[key]:
-                return row
-    raise ValueError(
-        "No row found from the read ocr table with given specs: " + wanted_items_on_row
-    )
+    if isinstance(table, OCRTable):
+        row = table.find_first(wanted_items_on_row)
+    else:
+        # The row itself is returned so that changes to it reach the table
+        row = next(
+            (
+                row
+                for row in table
+                if all(
+                    key in row and row[key] == value
+                    for key, value in wanted_items_on_row.items()
+                )
+            ),
+            None,
+        )
+    if row is None:
+        raise ValueError(
+            f"No row found from the read ocr table with given specs: {wanted_items_on_row}"
+        )
+    return row
 
 
 def calibrate_read_table_coordinates_to_global_coordinates(
@@ -514,10 +1441,13 @@ def calibrate_read_table_coordinates_to_global_coordinates(
     This keyword modifies these coordinates to be the coordinates on the screen.
 
     Arguments:
-    - table: data returned by ocr_tables() function (represents data in a table)
+    - table: data returned by ocr_tables() function (represents data in a table),
+      an ``OCRTable`` is moved in place without copying its rows
     - top: top y coordinate of the window that contains the table found with ocr_tables function
     - left: leftmost x coordinates of the window that contains the table found with ocr_tables function
     """
+    if isinstance(table, OCRTable):
+        return table.offset_coordinates(window_left, window_top)
     for item in table:
         item["x"] = int(window_left + item["x"])
         item["y"] = int(window_top + item["y"])
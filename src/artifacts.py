@@ -0,0 +1,56 @@
+import atexit
+import logging
+import queue
+import threading
+
+DEBUG_ARTIFACT_LEVELS = ("none", "summary", "full")
+
+
+class ArtifactWriter:
+    """
+    Renders and writes debug artifacts on a background thread.
+
+    Jobs wait in a bounded queue. When the queue is full, ``submit`` blocks
+    until the writer catches up, so artifacts can not pile up in memory.
+    """
+
+    def __init__(self, max_pending: int = 4):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def submit(self, function, *args, **kwargs):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="artifact-writer", daemon=True
+                )
+                self._thread.start()
+        self._queue.put((function, args, kwargs))
+
+    def flush(self):
+        """Waits until all submitted artifacts have been written."""
+        self._queue.join()
+
+    def _run(self):
+        while True:
+            function, args, kwargs = self._queue.get()
+            try:
+                function(*args, **kwargs)
+            except Exception:
+                logging.exception("Writing debug artifact failed")
+            finally:
+                self._queue.task_done()
+
+
+_writer = ArtifactWriter()
+atexit.register(_writer.flush)
+
+
+def submit_artifact(function, *args, **kwargs):
+    """Runs ``function`` on the background artifact writer."""
+    _writer.submit(function, *args, **kwargs)
+
+
+def flush_artifacts():
+    _writer.flush()
@@ -0,0 +1,257 @@
+import asyncio
+import os
+import time
+import weakref
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager
+from dataclasses import replace
+from functools import partial
+from typing import Union
+
+from PIL import Image
+
+import OCRLibrary
+from artifacts import submit_artifact
+from cache import cache_key, get_ocr_cache
+from configuration import TableConfiguration
+from engine import image_to_data_async
+from metrics import OCRMetrics, emit_metrics
+from preprocess import load_image, preprocess_image, resolve_zoom_factor
+from table import OCRTable
+from words import WordStore
+
+_executor = None
+_max_concurrency = os.cpu_count() or 1
+_limits = weakref.WeakKeyDictionary()
+
+
+def configure_async_ocr(max_concurrency: int = None, executor: Executor = None):
+    """
+    Sets how many OCR jobs may run at a time, defaults to the number of
+    CPUs, and the executor for the CPU bound work, defaults to the default
+    executor of the event loop.
+    """
+    global _executor, _max_concurrency
+    _max_concurrency = max_concurrency or os.cpu_count() or 1
+    _executor = executor
+    _limits.clear()
+
+
+@asynccontextmanager
+async def ocr_slot():
+    """Waits until fewer than ``max_concurrency`` OCR jobs are running."""
+    loop = asyncio.get_running_loop()
+    # Semaphores belong to one event loop
+    limit = _limits.get(loop)
+    if limit is None:
+        limit = _limits[loop] = asyncio.Semaphore(_max_concurrency)
+    async with limit:
+        yield
+
+
+async def run_in_executor(function, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(function, *args, **kwargs))
+
+
+async def find_texts(
+    image_in: Union[str, Image.Image],
+    image_out: str = None,
+    configuration: TableConfiguration = None,
+    max_combination_distance=None,
+    metrics: OCRMetrics = None,
+    source: str = None,
+):
+    """
+    Asynchronous ``OCRLibrary.find_texts``, see it for the arguments.
+
+    Tiled reads and reads reusing unchanged regions make several OCR calls
+    and run as one job on the executor.
+    """
+    text_blocks, original_image = await _read_texts(
+        image_in, image_out, configuration, max_combination_distance, metrics, source
+    )
+    if isinstance(text_blocks, WordStore):
+        text_blocks = await run_in_executor(text_blocks.to_dicts)
+    return text_blocks, original_image
+
+
+async def find_words(
+    image_in: Union[str, Image.Image],
+    image_out: str = None,
+    configuration: TableConfiguration = None,
+    metrics: OCRMetrics = None,
+    source: str = None,
+):
+    """Asynchronous ``OCRLibrary.find_words``, see it for the arguments."""
+    return await _read_texts(image_in, image_out, configuration, None, metrics, source)
+
+
+async def _read_texts(
+    image_in, image_out, configuration, max_combination_distance, metrics, source
+):
+    emit = metrics is None
+    if emit:
+        metrics = OCRMetrics("find_texts")
+    with metrics.stage("load"):
+        original_image = await run_in_executor(load_image, image_in)
+    if max_combination_distance is None and (
+        (source is not None and configuration.reuse_unchanged_regions)
+        or (
+            configuration.tiled_ocr
+            and original_image.height > configuration.tile_height
+        )
+    ):
+        async with ocr_slot():
+            return await run_in_executor(
+                OCRLibrary.find_words,
+                original_image,
+                image_out,
+                configuration,
+                None if emit else metrics,
+                source,
+            )
+
+    target_image, original_image, configuration = await run_in_executor(
+        _preprocess, original_image, configuration, metrics
+    )
+    zoom_factor = configuration.zoom_factor
+    metrics.count("ocr_calls")
+    metrics.count("ocr_pixels", target_image.width * target_image.height)
+    if emit:
+        metrics.set("image_width", original_image.width)
+        metrics.set("image_height", original_image.height)
+    if image_out:
+        submit_artifact(OCRLibrary.save_image_to_artifacts, target_image, image_out)
+
+    cache = get_ocr_cache() if configuration.use_ocr_cache else None
+    if cache is not None:
+        key = await run_in_executor(
+            cache_key, target_image, configuration, max_combination_distance
+        )
+        cached_blocks = await run_in_executor(cache.get, key)
+        if cached_blocks is not None:
+            metrics.count("cache_hits")
+            metrics.count("words", len(cached_blocks))
+            if emit:
+                emit_metrics(metrics)
+            if max_combination_distance is None:
+                cached_blocks = WordStore.from_dicts(cached_blocks)
+            return cached_blocks, original_image
+
+    async with ocr_slot():
+        with metrics.stage("tesseract"):
+            ocr_data = await image_to_data_async(target_image, configuration, _executor)
+    metrics.record_confidences(
+        conf for text, conf in zip(ocr_data["text"], ocr_data["conf"]) if text.strip()
+    )
+    started = time.perf_counter()
+    if max_combination_distance is None:
+        text_blocks = await run_in_executor(
+            WordStore.from_ocr_data,
+            ocr_data,
+            zoom_factor,
+            configuration.confidence_level,
+        )
+    else:
+        text_blocks = await run_in_executor(
+            OCRLibrary.text_blocks_from_ocr_data,
+            ocr_data,
+            zoom_factor,
+            configuration,
+            max_combination_distance,
+        )
+    metrics.add_time("parse", time.perf_counter() - started)
+    metrics.count("words", len(text_blocks))
+    if cache is not None:
+        await run_in_executor(
+            cache.put,
+            key,
+            (
+                text_blocks.to_dicts()
+                if isinstance(text_blocks, WordStore)
+                else text_blocks
+            ),
+        )
+    if emit:
+        emit_metrics(metrics)
+    return text_blocks, original_image
+
+
+def _preprocess(image, configuration, metrics):
+    # Choosing the zoom scans the whole image, so it runs on the executor too
+    zoom_factor = resolve_zoom_factor(image, configuration)
+    if zoom_factor != configuration.zoom_factor:
+        configuration = replace(configuration, zoom_factor=zoom_factor)
+    target_image, image = preprocess_image(image, configuration, metrics)
+    return target_image, image, configuration
+
+
+async def ocr_table(
+    configuration: TableConfiguration,
+    image_in: Union[str, Image.Image] = None,
+    result_json: str = None,
+    return_metrics: bool = False,
+    source: str = None,
+    as_table: bool = False,
+):
+    """
+    Asynchronous ``OCRLibrary.ocr_table``, see it for the arguments.
+
+    Tables read by regions or columns, or with the layout cache, make several
+    OCR calls and run as one job on the executor.
+    """
+    if (
+        configuration.region_of_interest
+        or configuration.column_ocr
+        or configuration.use_layout_cache
+    ):
+        async with ocr_slot():
+            return await run_in_executor(
+                OCRLibrary.ocr_table,
+                configuration,
+                image_in,
+                result_json,
+                return_metrics,
+                source,
+                as_table,
+            )
+    started = time.perf_counter()
+    metrics = OCRMetrics("ocr_table")
+    data, image = await find_words(
+        image_in=image_in,
+        configuration=configuration,
+        image_out=OCRLibrary.preprocessed_image_name(configuration),
+        metrics=metrics,
+        source=source or (image_in if isinstance(image_in, str) else None),
+    )
+    table = await run_in_executor(
+        _table_from_words, configuration, image, data, metrics, result_json, as_table
+    )
+    metrics.add_time("total", time.perf_counter() - started)
+    emit_metrics(metrics)
+    if return_metrics:
+        return table, metrics
+    return table
+
+
+def _table_from_words(configuration, image, data, metrics, result_json, as_table):
+    with metrics.stage("row_grouping"):
+        data = OCRLibrary.combine_by_top_range(
+            data, tolerance=configuration.row_tolerance
+        )
+    _, header, column_definitions = OCRLibrary.locate_header(
+        data, configuration, metrics
+    )
+    table = OCRLibrary.complete_table(
+        configuration, image, data, header, column_definitions, metrics, result_json
+    )
+    if as_table:
+        # The same columns as OCRLibrary.ocr_table, also when no row was read
+        table = OCRTable(table, columns=[*column_definitions, "x", "y"])
+    return table
+
+
+async def find_matching(texts, search, **kwargs):
+    """Asynchronous ``OCRLibrary.find_matching``, see it for the arguments."""
+    return await run_in_executor(OCRLibrary.find_matching, texts, search, **kwargs)
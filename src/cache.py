@@ -0,0 +1,176 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+# Configuration fields that change the result of find_texts
+CACHE_KEY_FIELDS = (
+    "tesseract_oem_mode",
+    "tesseract_psm_mode",
+    "language",
+    "tesseract_configurations",
+    "confidence_level",
+    "zoom_factor",
+)
+
+
+def cache_key(image, configuration, *extra):
+    """
+    Returns a content hash of the preprocessed image and the OCR relevant
+    fields of the configuration.
+    """
+    digest = hashlib.blake2b(digest_size=20)
+    fields = {name: getattr(configuration, name) for name in CACHE_KEY_FIELDS}
+    digest.update(json.dumps([fields, extra], sort_keys=True).encode("utf-8"))
+    digest.update(f"{image.mode}:{image.width}x{image.height}".encode("utf-8"))
+    digest.update(image.tobytes())
+    return digest.hexdigest()
+
+
+class OCRCache:
+    """
+    Two tier cache for OCR results.
+
+    Results are kept in an in-memory LRU of ``max_items`` entries and, if
+    ``directory`` is given, as JSON files on disk. The disk tier evicts the
+    least recently used files when it grows over ``max_disk_bytes``.
+    """
+
+    def __init__(
+        self,
+        max_items: int = 128,
+        directory: str = None,
+        max_disk_bytes: int = 256 * 1024 * 1024,
+    ):
+        self.max_items = max_items
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_items": len(self._memory),
+        }
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return _copy(self._memory[key])
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, value)
+        return _copy(value)
+
+    def put(self, key: str, value):
+        value = _copy(value)
+        with self._lock:
+            self._remember(key, value)
+        if self.directory:
+            self._write_disk(key, value)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        for entry in self._disk_entries():
+            os.remove(entry.path)
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, encoding="utf-8") as infile:
+                value = json.load(infile)
+            # Refresh the modification time so that eviction is LRU
+            os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            logging.warning(f"Ignoring unreadable OCR cache entry {path}: {error}")
+            return None
+
+    def _write_disk(self, key, value):
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as outfile:
+            json.dump(value, outfile, ensure_ascii=False)
+        os.replace(temp_path, self._path(key))
+        self._evict_disk()
+
+    def _disk_entries(self):
+        if not self.directory:
+            return []
+        return [
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and entry.name.endswith(".json")
+        ]
+
+    def _evict_disk(self):
+        entries = [(entry, entry.stat()) for entry in self._disk_entries()]
+        total = sum(stat.st_size for _, stat in entries)
+        for entry, stat in sorted(entries, key=lambda item: item[1].st_mtime):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+            total -= stat.st_size
+
+
+def _copy(text_blocks):
+    # Callers may modify the returned blocks
+    return [dict(block) for block in text_blocks]
+
+
+_cache = OCRCache()
+
+
+def get_ocr_cache():
+    return _cache
+
+
+def configure_ocr_cache(
+    max_items: int = 128,
+    directory: str = None,
+    max_disk_bytes: int = 256 * 1024 * 1024,
+):
+    """Replaces the cache used by ``find_texts`` and returns it."""
+    global _cache
+    _cache = OCRCache(
+        max_items=max_items, directory=directory, max_disk_bytes=max_disk_bytes
+    )
+    return _cache
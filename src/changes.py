@@ -0,0 +1,267 @@
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, List
+
+import numpy as np
+from PIL import Image
+
+from cache import CACHE_KEY_FIELDS
+
+
+@dataclass
+class Frame:
+    """Last capture of a source and the text blocks found from it."""
+
+    gray: np.ndarray
+    signature: str
+    text_blocks: list
+
+
+def configuration_signature(configuration):
+    fields = {name: getattr(configuration, name) for name in CACHE_KEY_FIELDS}
+    for name in ("brightness", "contrast", "threshold", "invert_colors", "sharpen"):
+        fields[name] = getattr(configuration, name)
+    return json.dumps(fields, sort_keys=True)
+
+
+def changed_tiles(
+    previous: np.ndarray, current: np.ndarray, tile_size: int, tolerance: int
+):
+    """
+    Returns a boolean grid with True for the tiles where any pixel differs
+    more than ``tolerance`` gray levels between the two images.
+    """
+    changed = np.abs(previous - current) > tolerance
+    height, width = changed.shape
+    rows = -(-height // tile_size)
+    columns = -(-width // tile_size)
+    padded = np.zeros((rows * tile_size, columns * tile_size), dtype=bool)
+    padded[:height, :width] = changed
+    return padded.reshape(rows, tile_size, columns, tile_size).any(axis=(1, 3))
+
+
+def dirty_regions(tiles: np.ndarray, tile_size: int, width: int, height: int):
+    """Returns the bounding boxes of connected groups of changed tiles."""
+    seen = np.zeros_like(tiles)
+    regions = []
+    for row, column in zip(*np.nonzero(tiles)):
+        if seen[row, column]:
+            continue
+        seen[row, column] = True
+        stack = [(row, column)]
+        top, left, bottom, right = row, column, row, column
+        while stack:
+            r, c = stack.pop()
+            top, left = min(top, r), min(left, c)
+            bottom, right = max(bottom, r), max(right, c)
+            for nr, nc in ((r - 1, c), (r + 1, c), (r, c - 1), (r, c + 1)):
+                if (
+                    0 <= nr < tiles.shape[0]
+                    and 0 <= nc < tiles.shape[1]
+                    and tiles[nr, nc]
+                    and not seen[nr, nc]
+                ):
+                    seen[nr, nc] = True
+                    stack.append((nr, nc))
+        regions.append(
+            [
+                left * tile_size,
+                top * tile_size,
+                min((right + 1) * tile_size, width),
+                min((bottom + 1) * tile_size, height),
+            ]
+        )
+    return regions
+
+
+def _intersects(box, block):
+    return (
+        block["left"] < box[2]
+        and block["right"] > box[0]
+        and block["top"] < box[3]
+        and block["bottom"] > box[1]
+    )
+
+
+def _contains_center(box, block):
+    return box[0] <= block["x"] < box[2] and box[1] <= block["y"] < box[3]
+
+
+def grow_regions(regions: List[list], text_blocks: list):
+    """
+    Grows the regions to cover the text blocks they cut and merges
+    overlapping regions, until no region cuts a text block.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for box in regions:
+            for block in text_blocks:
+                if _intersects(box, block):
+                    grown = [
+                        min(box[0], int(block["left"])),
+                        min(box[1], int(block["top"])),
+                        max(box[2], int(-(-block["right"] // 1))),
+                        max(box[3], int(-(-block["bottom"] // 1))),
+                    ]
+                    if grown != box:
+                        box[:] = grown
+                        changed = True
+        # Any two regions may overlap, not only neighbours in some order,
+        # and a grown region may reach regions it was checked against
+        merged = []
+        for box in regions:
+            box = list(box)
+            overlapping = True
+            while overlapping:
+                overlapping = False
+                for other in merged:
+                    if _intersects(
+                        other,
+                        {
+                            "left": box[0],
+                            "top": box[1],
+                            "right": box[2],
+                            "bottom": box[3],
+                        },
+                    ):
+                        merged.remove(other)
+                        box = [
+                            min(other[0], box[0]),
+                            min(other[1], box[1]),
+                            max(other[2], box[2]),
+                            max(other[3], box[3]),
+                        ]
+                        overlapping = changed = True
+                        break
+            merged.append(box)
+        regions = sorted(merged)
+    return regions
+
+
+class ChangeTracker:
+    """
+    Reuses OCR results between repeated captures of the same source.
+
+    The last capture of every source, e.g. a window locator or an image
+    path, is kept with its text blocks. A new capture is compared to it in
+    ``tile_size`` tiles, and only the regions of changed tiles are OCR'd
+    again. Text blocks outside the changed regions are reused.
+
+    The whole image is read when there is no earlier capture, its size or
+    the OCR configuration changed, or more than ``max_dirty_ratio`` of the
+    image changed.
+    """
+
+    def __init__(
+        self,
+        tile_size: int = 32,
+        tolerance: int = 16,
+        padding: int = 8,
+        max_dirty_ratio: float = 0.5,
+        max_sources: int = 32,
+    ):
+        self.tile_size = tile_size
+        self.tolerance = tolerance
+        self.padding = padding
+        self.max_dirty_ratio = max_dirty_ratio
+        self.max_sources = max_sources
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def forget(self, source: str = None):
+        """Forgets the last capture of the source, or of all sources."""
+        with self._lock:
+            if source is None:
+                self._frames.clear()
+            else:
+                self._frames.pop(source, None)
+
+    def find_texts(
+        self,
+        source: str,
+        image: Image.Image,
+        configuration,
+        read_texts: Callable,
+        metrics=None,
+    ):
+        """
+        Returns the text blocks of the image.
+
+        ``read_texts(region)`` is called to OCR a (left, top, right, bottom)
+        region of the image, or the whole image when the region is None,
+        and returns text blocks in image coordinates.
+        """
+        gray = np.asarray(image.convert("L"), dtype=np.int16)
+        signature = configuration_signature(configuration)
+        with self._lock:
+            frame = self._frames.get(source)
+        regions = None
+        if (
+            frame is not None
+            and frame.signature == signature
+            and frame.gray.shape == gray.shape
+        ):
+            tiles = changed_tiles(frame.gray, gray, self.tile_size, self.tolerance)
+            regions = dirty_regions(tiles, self.tile_size, image.width, image.height)
+            regions = grow_regions(regions, frame.text_blocks)
+            dirty = sum((r[2] - r[0]) * (r[3] - r[1]) for r in regions)
+            if dirty > self.max_dirty_ratio * image.width * image.height:
+                logging.debug(f"{source}: {dirty} pixels changed, reading all")
+                regions = None
+
+        if regions is None:
+            text_blocks = read_texts(None)
+        else:
+            text_blocks = [
+                dict(block)
+                for block in frame.text_blocks
+                if not any(_intersects(region, block) for region in regions)
+            ]
+            if metrics is not None:
+                metrics.count("reused_words", len(text_blocks))
+                metrics.count("dirty_regions", len(regions))
+            for index, region in enumerate(regions):
+                padded = (
+                    max(region[0] - self.padding, 0),
+                    max(region[1] - self.padding, 0),
+                    min(region[2] + self.padding, image.width),
+                    min(region[3] + self.padding, image.height),
+                )
+                # Words of the padding belong to the unchanged area and words
+                # claimed by an earlier region are not added twice
+                text_blocks.extend(
+                    block
+                    for block in read_texts(padded)
+                    if _contains_center(region, block)
+                    and not any(
+                        _contains_center(earlier, block) for earlier in regions[:index]
+                    )
+                )
+            text_blocks.sort(key=lambda block: (block["top"], block["left"]))
+
+        with self._lock:
+            self._frames[source] = Frame(
+                gray, signature, [dict(block) for block in text_blocks]
+            )
+            self._frames.move_to_end(source)
+            while len(self._frames) > self.max_sources:
+                self._frames.popitem(last=False)
+        return text_blocks
+
+
+_tracker = ChangeTracker()
+
+
+def get_change_tracker():
+    return _tracker
+
+
+def configure_change_tracker(**settings):
+    """Replaces the tracker used by ``find_texts`` and returns it."""
+    global _tracker
+    _tracker = ChangeTracker(**settings)
+    return _tracker
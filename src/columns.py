@@ -0,0 +1,167 @@
+import bisect
+
+import numpy as np
+
+COLUMN_ASSIGNMENT_MODES = ("contained", "center", "overlap")
+
+
+class ColumnIndex:
+    """
+    Finalized column definitions compiled into a sorted boundary index.
+
+    The x axis is split into segments at every column edge and each segment
+    lists the columns covering it in definition order. Finding the columns
+    at a point is then a bisect, or ``np.searchsorted`` for many words,
+    instead of a scan over all columns.
+
+    Words are assigned to columns with one of the modes:
+    - contained: the word box must be inside the column
+    - center: the center of the word box must be inside the column
+    - overlap: the column overlapping most with the word box
+    When several columns qualify, the one defined first wins.
+    """
+
+    def __init__(self, column_definitions):
+        self.columns = [
+            (name, col["left"], col["left"] + col["width"])
+            for name, col in column_definitions.items()
+        ]
+        self._edges = sorted(
+            {edge for _, left, right in self.columns for edge in (left, right)}
+        )
+        self._segments = [
+            [
+                i
+                for i, (_, left, right) in enumerate(self.columns)
+                if left <= start and end <= right
+            ]
+            for start, end in zip(self._edges, self._edges[1:])
+        ]
+        # The segments as an array padded with -1 for assign_many, with an
+        # extra empty segment for the points outside of all segments
+        width = max((len(segment) for segment in self._segments), default=0)
+        self._members = np.full((len(self._segments) + 1, max(width, 1)), -1)
+        for i, segment in enumerate(self._segments):
+            self._members[i, : len(segment)] = segment
+        self._edge_array = np.array(self._edges, dtype=np.float64)
+        self._lefts = np.array([left for _, left, _ in self.columns], dtype=np.float64)
+        self._rights = np.array(
+            [right for _, _, right in self.columns], dtype=np.float64
+        )
+
+    def _covering(self, x):
+        """Indexes of the columns whose left <= x <= right."""
+        if not self._segments or x < self._edges[0] or x > self._edges[-1]:
+            return []
+        i = min(bisect.bisect_right(self._edges, x) - 1, len(self._segments) - 1)
+        if x == self._edges[i] and i > 0:
+            # A point on an edge is also inside columns ending there
+            return sorted(set(self._segments[i - 1]) | set(self._segments[i]))
+        if x == self._edges[-1]:
+            return self._segments[-1]
+        return self._segments[i]
+
+    def _overlapping(self, left, right):
+        start = max(bisect.bisect_right(self._edges, left) - 1, 0)
+        end = bisect.bisect_left(self._edges, right)
+        return sorted({i for segment in self._segments[start:end] for i in segment})
+
+    def assign(self, left, right, mode: str = "contained"):
+        """Returns the name of the column for a word box or None."""
+        if mode == "contained":
+            for i in self._covering(left):
+                if right <= self.columns[i][2]:
+                    return self.columns[i][0]
+            return None
+        if mode == "center":
+            covering = self._covering((left + right) / 2)
+            return self.columns[covering[0]][0] if covering else None
+        if mode == "overlap":
+            best_name, best_overlap = None, 0
+            for i in self._overlapping(left, right):
+                name, col_left, col_right = self.columns[i]
+                overlap = min(right, col_right) - max(left, col_left)
+                if overlap > best_overlap:
+                    best_name, best_overlap = name, overlap
+            return best_name
+        raise ValueError(
+            f"Unknown column assignment mode: {mode}. "
+            f"Expected one of {COLUMN_ASSIGNMENT_MODES}"
+        )
+
+    def _segment_positions(self, positions):
+        """Segment indexes of the array, the empty segment where out of range."""
+        count = len(self._segments)
+        return np.where((positions >= 0) & (positions < count), positions, count)
+
+    def _covering_many(self, xs):
+        """
+        Padded indexes of the columns whose left <= x <= right for each x,
+        from the segments starting and ending at x.
+        """
+        starting = np.searchsorted(self._edge_array, xs, side="right") - 1
+        ending = np.searchsorted(self._edge_array, xs, side="left") - 1
+        return np.hstack(
+            (
+                self._members[self._segment_positions(starting)],
+                self._members[self._segment_positions(ending)],
+            )
+        )
+
+    def _first(self, candidates, found):
+        """The name of the first column defined among the found candidates."""
+        first = np.where(found, candidates, len(self.columns)).min(axis=1)
+        names = [name for name, _, _ in self.columns]
+        return [names[i] if i < len(names) else None for i in first.tolist()]
+
+    def assign_many(self, lefts, rights, mode: str = "contained"):
+        """
+        Returns the column name, or None, for each word box like ``assign``,
+        looking up the segments of all boxes at once with ``np.searchsorted``.
+        """
+        lefts = np.asarray(lefts, dtype=np.float64)
+        rights = np.asarray(rights, dtype=np.float64)
+        if mode not in COLUMN_ASSIGNMENT_MODES:
+            raise ValueError(
+                f"Unknown column assignment mode: {mode}. "
+                f"Expected one of {COLUMN_ASSIGNMENT_MODES}"
+            )
+        if not self._segments or not len(lefts):
+            return [None] * len(lefts)
+        if mode == "contained":
+            candidates = self._covering_many(lefts)
+            found = (candidates >= 0) & (rights[:, None] <= self._rights[candidates])
+            return self._first(candidates, found)
+        if mode == "center":
+            candidates = self._covering_many((lefts + rights) / 2)
+            return self._first(candidates, candidates >= 0)
+        # The segments between the edges around the box overlap with it
+        first = np.maximum(
+            np.searchsorted(self._edge_array, lefts, side="right") - 1, 0
+        )
+        last = np.minimum(
+            np.searchsorted(self._edge_array, rights, side="left") - 1,
+            len(self._segments) - 1,
+        )
+        best = np.full(len(lefts), len(self.columns))
+        best_overlap = np.zeros(len(lefts))
+        for offset in range(int((last - first).max(initial=-1)) + 1):
+            segment = np.where(
+                first + offset <= last, first + offset, len(self._segments)
+            )
+            candidates = self._members[segment]
+            overlap = np.minimum(
+                rights[:, None], self._rights[candidates]
+            ) - np.maximum(lefts[:, None], self._lefts[candidates])
+            overlap = np.where(candidates >= 0, overlap, 0)
+            for i in range(candidates.shape[1]):
+                # Equal overlaps go to the column defined first
+                better = (overlap[:, i] > best_overlap) | (
+                    (overlap[:, i] == best_overlap)
+                    & (overlap[:, i] > 0)
+                    & (candidates[:, i] < best)
+                )
+                best = np.where(better, candidates[:, i], best)
+                best_overlap = np.where(better, overlap[:, i], best_overlap)
+        names = [name for name, _, _ in self.columns]
+        return [names[i] if i < len(names) else None for i in best.tolist()]
@@ -14,10 +14,30 @@ class OCRConfiguration:
     # -c preserve_interword_spaces=1
     tesseract_configurations: str = ""
     language: str = "eng"
+    # "auto" reuses warm in-process engines when tesserocr is installed,
+    # "pool" requires them and "subprocess" starts tesseract for every call
+    tesseract_engine: str = "auto"
     zoom_factor: int = 8
+    # choose the zoom per image so that text lines become about
+    # target_text_height pixels tall, within min and max zoom factor
+    adaptive_zoom: bool = False
+    target_text_height: int = 32
+    min_zoom_factor: float = 1.0
+    max_zoom_factor: float = 8.0
     brightness: float = 1.4
     contrast: float = 1.2
     confidence_level: int = 40
+    # reuse results of earlier OCR runs on identical preprocessed images
+    use_ocr_cache: bool = False
+    # OCR only the regions that changed since the previous capture of the
+    # same source (window locator or image path), see changes.ChangeTracker
+    reuse_unchanged_regions: bool = False
+    # OCR images taller than tile_height pixels in horizontal bands that
+    # overlap by tile_overlap pixels, tile_workers bands at a time
+    tiled_ocr: bool = False
+    tile_height: int = 512
+    tile_overlap: int = 32
+    tile_workers: int = None
     # Threshold for binarization. If -1, no binarization is done.
     threshold: int = 190
     invert_colors: bool = False
@@ -26,6 +46,10 @@ class OCRConfiguration:
     show_pre_ocr_image: bool = False
     # display image showing recognized table and its columns
     show_post_recognition_image: bool = False
+    # debug images written into the artifacts directory in the background:
+    # "none", "summary" (identified table) or "full" (also the preprocessed
+    # image and column crops)
+    debug_artifacts: str = "full"
 
     def clone(self):
         # Create a deep copy of the current instance and return it.
@@ -44,7 +68,51 @@ class TableConfiguration(OCRConfiguration):
 
     headers: List[str] = field(default_factory=list)
     margins: Dict[str, int] = field(default_factory=dict)
+    # words whose tops are within this many pixels belong to the same row
+    row_tolerance: int = 8
     column_definitions: Dict[str, Dict] = field(default_factory=dict)
+    # first OCR the whole image at header_zoom_factor to locate the header
+    # and then OCR only the table body below it at zoom_factor
+    region_of_interest: bool = False
+    header_zoom_factor: int = 2
+    # OCR every column of the table body as its own job in parallel,
+    # using the settings given with set_column_ocr
+    column_ocr: bool = False
+    column_ocr_settings: Dict[str, Dict] = field(default_factory=dict)
+    column_ocr_workers: int = None
+    # how words are assigned to columns: "contained", "center" or "overlap"
+    column_assignment: str = "contained"
+    # read the cells again that have words below refinement_confidence or
+    # that fail the regex (or "date", "amount" or "integer") of their column
+    # in column_validators, with each of the configuration overrides in
+    # refinement_variants, keeping the best reading whose words all reach
+    # refinement_confidence; cells without words only with refine_empty_cells
+    refine_low_confidence: bool = False
+    refinement_confidence: int = 70
+    refine_empty_cells: bool = False
+    column_validators: Dict[str, str] = field(default_factory=dict)
+    refinement_variants: List[Dict] = field(
+        default_factory=lambda: [
+            {"zoom_factor": 4, "tesseract_psm_mode": 7},
+            {"zoom_factor": 6, "threshold": -1, "tesseract_psm_mode": 7},
+            {"zoom_factor": 8, "threshold": 150, "tesseract_psm_mode": 7},
+        ]
+    )
+    refinement_workers: int = None
+    # reuse the header and columns found earlier for images of the same size
+    # and header look after checking the header texts, see layout.LayoutCache
+    use_layout_cache: bool = False
+    # ocr_table_by_structure finds the rows and columns from ruling lines
+    # covering structure_line_ratio of the table, or else from blank gutters
+    # of structure_row_gap and structure_column_gap pixels, before OCR
+    structure_row_gap: int = 3
+    structure_column_gap: int = 12
+    structure_line_ratio: float = 0.8
+    # by default the table is OCR'd once and the words are placed into the
+    # cells, or else every cell with ink is OCR'd as its own job,
+    # structure_workers at a time
+    structure_cell_ocr: bool = False
+    structure_workers: int = None
     # by default all columns are highlighted, but you can specify which ones
     column_highlights: List[str] = field(default_factory=list)
     # any column in this collection will be cropped into separate images
@@ -77,3 +145,37 @@ class TableConfiguration(OCRConfiguration):
 
     def remove_column(self, column_name: str):
         self.column_definitions.pop(column_name, None)
+
+    def set_column_validator(self, column_name: str, pattern: str):
+        """Set the pattern that texts of the column must fully match.
+
+        Cells failing it are read again when refine_low_confidence is enabled.
+
+        :param column_name: name of the column
+        :param pattern: regular expression or "date", "amount" or "integer"
+        """
+        self.column_validators[column_name] = pattern
+
+    def set_column_ocr(
+        self,
+        column_name: str,
+        psm: int = None,
+        whitelist: str = None,
+        threshold: int = None,
+        **settings,
+    ):
+        """Set OCR settings used for the column when column_ocr is enabled.
+
+        :param column_name: name of the column
+        :param psm: Tesseract page segmentation mode for the column
+        :param whitelist: characters Tesseract is allowed to recognize
+        :param threshold: binarization threshold for the column
+        :param settings: any other OCRConfiguration fields to override
+        """
+        if psm is not None:
+            settings["tesseract_psm_mode"] = psm
+        if whitelist is not None:
+            settings["whitelist"] = whitelist
+        if threshold is not None:
+            settings["threshold"] = threshold
+        self.column_ocr_settings[column_name] = settings
@@ -0,0 +1,233 @@
+import asyncio
+import atexit
+import io
+import logging
+import shlex
+import threading
+from contextlib import contextmanager
+
+import pytesseract
+from pytesseract import Output
+from pytesseract.pytesseract import TesseractError, file_to_dict, prepare
+
+try:
+    import tesserocr
+except ImportError:  # in-process engines are optional
+    tesserocr = None
+
+# GetTSVText() returns the rows without the header line the CLI writes
+TSV_HEADER = "\t".join(
+    [
+        "level",
+        "page_num",
+        "block_num",
+        "par_num",
+        "line_num",
+        "word_num",
+        "left",
+        "top",
+        "width",
+        "height",
+        "conf",
+        "text",
+    ]
+)
+
+
+def tesseract_command_line(configuration):
+    return (
+        rf"--oem {configuration.tesseract_oem_mode} "
+        rf"--psm {configuration.tesseract_psm_mode} "
+        rf"{configuration.tesseract_configurations}"
+    ).strip()
+
+
+def parse_tesseract_variables(tesseract_configurations: str):
+    """
+    Converts command line style configurations into Tesseract variables.
+
+    Returns None if the configurations contain options that cannot be
+    expressed as variables of an in-process engine.
+    """
+    variables = {}
+    tokens = shlex.split(tesseract_configurations or "")
+    while tokens:
+        token = tokens.pop(0)
+        if token == "-c" and tokens:
+            token = tokens.pop(0)
+        elif token.startswith("-c"):
+            token = token[2:]
+        elif token == "--dpi" and tokens:
+            token = f"user_defined_dpi={tokens.pop(0)}"
+        else:
+            return None
+        name, separator, value = token.partition("=")
+        if not separator:
+            return None
+        variables[name] = value
+    return variables
+
+
+def engine_key(configuration):
+    return (
+        configuration.language,
+        configuration.tesseract_oem_mode,
+        configuration.tesseract_psm_mode,
+        configuration.tesseract_configurations,
+    )
+
+
+class TesseractEngine:
+    """Initialized Tesseract instance with its language model loaded."""
+
+    def __init__(self, language: str, oem: int, psm: int, configurations: str = ""):
+        if tesserocr is None:
+            raise ImportError("In-process Tesseract engines require tesserocr")
+        self.api = tesserocr.PyTessBaseAPI(
+            lang=language,
+            oem=oem,
+            psm=psm,
+            variables=parse_tesseract_variables(configurations) or {},
+        )
+
+    def image_to_data(self, image):
+        """Same result as ``pytesseract.image_to_data`` with ``Output.DICT``."""
+        try:
+            self.api.SetImage(image)
+            tsv = self.api.GetTSVText(0)
+        finally:
+            self.api.Clear()
+        return file_to_dict(f"{TSV_HEADER}\n{tsv}", "\t", -1)
+
+    def close(self):
+        self.api.End()
+
+
+class EnginePool:
+    """
+    Thread-safe pool of warm Tesseract engines.
+
+    Engines are keyed by language, OEM, PSM and extra configurations. A new
+    engine is created when all engines for a key are in use, and at most
+    ``max_idle_per_key`` engines per key are kept warm after use.
+    """
+
+    def __init__(self, max_idle_per_key: int = 4):
+        self.max_idle_per_key = max_idle_per_key
+        self._idle = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def engine(self, key):
+        with self._lock:
+            idle = self._idle.get(key)
+            engine = idle.pop() if idle else None
+        if engine is None:
+            logging.info(f"Starting Tesseract engine for {key}")
+            engine = TesseractEngine(*key)
+        try:
+            yield engine
+        except Exception:
+            # The engine may be left in an unknown state
+            engine.close()
+            raise
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_key:
+                idle.append(engine)
+                engine = None
+        if engine is not None:
+            engine.close()
+
+    def close(self):
+        with self._lock:
+            engines = [engine for idle in self._idle.values() for engine in idle]
+            self._idle.clear()
+        for engine in engines:
+            engine.close()
+
+
+_pool = EnginePool()
+atexit.register(_pool.close)
+
+
+def get_engine_pool():
+    return _pool
+
+
+def use_engine_pool(configuration):
+    if configuration.tesseract_engine == "subprocess":
+        return False
+    if configuration.tesseract_engine == "pool":
+        if tesserocr is None:
+            raise ImportError("tesseract_engine 'pool' requires tesserocr")
+        if parse_tesseract_variables(configuration.tesseract_configurations) is None:
+            raise ValueError(
+                "Configurations can not be used with an in-process engine: "
+                f"{configuration.tesseract_configurations}"
+            )
+        return True
+    if configuration.tesseract_engine == "auto":
+        return (
+            tesserocr is not None
+            and parse_tesseract_variables(configuration.tesseract_configurations)
+            is not None
+        )
+    raise ValueError(f"Unknown Tesseract engine: {configuration.tesseract_engine}")
+
+
+def image_to_data(image, configuration):
+    """
+    Runs OCR for the image and returns the result in the format of
+    ``pytesseract.image_to_data`` with ``Output.DICT``.
+
+    Uses a warm engine from the pool when possible, otherwise a new
+    ``tesseract`` process is started for the call.
+    """
+    if use_engine_pool(configuration):
+        with _pool.engine(engine_key(configuration)) as engine:
+            return engine.image_to_data(image)
+    return pytesseract.image_to_data(
+        image,
+        output_type=Output.DICT,
+        lang=configuration.language,
+        config=tesseract_command_line(configuration),
+    )
+
+
+def _encode_png(image):
+    image, _ = prepare(image)
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+async def image_to_data_async(image, configuration, executor=None):
+    """
+    Asynchronous ``image_to_data``.
+
+    ``tesseract`` is run as a non-blocking subprocess that reads the image
+    from stdin and writes TSV to stdout. In-process engines and the PNG
+    encoding run on ``executor``, the default executor of the loop if None.
+    """
+    loop = asyncio.get_running_loop()
+    if use_engine_pool(configuration):
+        return await loop.run_in_executor(executor, image_to_data, image, configuration)
+    png = await loop.run_in_executor(executor, _encode_png, image)
+    process = await asyncio.create_subprocess_exec(
+        pytesseract.pytesseract.tesseract_cmd,
+        "stdin",
+        "stdout",
+        "-l",
+        configuration.language,
+        "-c",
+        "tessedit_create_tsv=1",
+        *shlex.split(tesseract_command_line(configuration)),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    output, errors = await process.communicate(png)
+    if process.returncode:
+        raise TesseractError(process.returncode, errors.decode("utf-8", "replace"))
+    return file_to_dict(output.decode("utf-8"), "\t", -1)
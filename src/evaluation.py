@@ -0,0 +1,54 @@
+from difflib import SequenceMatcher
+
+# Keys of a read table row that are coordinates, not cells
+COORDINATE_KEYS = ("x", "y")
+
+
+def table_columns(table):
+    columns = []
+    for row in table:
+        for key in row:
+            if key not in COORDINATE_KEYS and key not in columns:
+                columns.append(key)
+    return columns
+
+
+def compare_tables(expected, actual, columns=None):
+    """
+    Compares a read table against the expected table cell by cell.
+
+    Rows are compared in order, so a missing or extra row counts every
+    cell after it as wrong. Returns a dictionary with the cell counts,
+    ``cell_accuracy`` (share of cells read exactly) and
+    ``character_accuracy`` (mean similarity of the cell texts).
+    """
+    expected = list(expected)
+    actual = list(actual)
+    columns = columns or table_columns(expected)
+    cells = correct = 0
+    similarity = 0.0
+    for index in range(max(len(expected), len(actual))):
+        expected_row = expected[index] if index < len(expected) else {}
+        actual_row = actual[index] if index < len(actual) else {}
+        for column in columns:
+            expected_text = str(expected_row.get(column, ""))
+            actual_text = str(actual_row.get(column, ""))
+            cells += 1
+            if expected_text == actual_text:
+                correct += 1
+                similarity += 1.0
+            else:
+                similarity += SequenceMatcher(None, expected_text, actual_text).ratio()
+    return {
+        "expected_rows": len(expected),
+        "actual_rows": len(actual),
+        "cells": cells,
+        "correct_cells": correct,
+        "cell_accuracy": correct / cells if cells else 1.0,
+        "character_accuracy": similarity / cells if cells else 1.0,
+    }
+
+
+def cell_accuracy(expected, actual, columns=None):
+    """Share of the expected cells that were read exactly."""
+    return compare_tables(expected, actual, columns)["cell_accuracy"]
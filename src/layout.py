@@ -0,0 +1,164 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from typing import Callable
+
+from PIL import Image
+
+# Size of the difference hash of the header band, in bits per row and rows
+HASH_SIZE = (16, 8)
+# Pixels around the header words included in the header band
+BAND_PADDING = 4
+
+
+def header_band(image: Image.Image, header: list, padding: int = BAND_PADDING):
+    """Returns (left, top, right, bottom) around the header words."""
+    left = min(word["left"] for word in header) - padding
+    top = min(word["top"] for word in header) - padding
+    right = max(word["right"] for word in header) + padding
+    bottom = max(word["bottom"] for word in header) + padding
+    return (
+        max(int(left), 0),
+        max(int(top), 0),
+        min(int(right + 1), image.width),
+        min(int(bottom + 1), image.height),
+    )
+
+
+def difference_hash(image: Image.Image, box: tuple, size: tuple = HASH_SIZE):
+    """
+    Returns a perceptual hash of the box of the image as an integer, with a
+    bit per pair of horizontally adjacent pixels of the downscaled box.
+    """
+    width, height = size
+    small = image.convert("L").crop(box).resize((width + 1, height), Image.BOX)
+    pixels = list(small.getdata())
+    value = 0
+    for row in range(height):
+        for column in range(width):
+            index = row * (width + 1) + column
+            value = (value << 1) | (pixels[index] > pixels[index + 1])
+    return value
+
+
+def layout_key(image: Image.Image, configuration):
+    fields = json.dumps(
+        [configuration.headers, configuration.column_definitions], sort_keys=True
+    )
+    digest = hashlib.blake2b(fields.encode("utf-8"), digest_size=12).hexdigest()
+    return f"{image.width}x{image.height}:{digest}"
+
+
+class LayoutCache:
+    """
+    Remembers where the header and columns of known screens are.
+
+    Layouts are keyed by the image size and the header and column settings,
+    and told apart by a difference hash of the header band. A layout is
+    used only when its header texts are found again by OCR of the header
+    band, otherwise the caller detects the layout from scratch.
+
+    If ``path`` is given, the layouts are also kept in that JSON file.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_layouts_per_key: int = 8,
+        max_hash_distance: int = 12,
+    ):
+        self.path = path
+        self.max_layouts_per_key = max_layouts_per_key
+        self.max_hash_distance = max_hash_distance
+        self.hits = 0
+        self.misses = 0
+        self._layouts = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding="utf-8") as infile:
+                    self._layouts = json.load(infile)
+            except (OSError, ValueError) as error:
+                logging.warning(f"Ignoring unreadable layout cache {path}: {error}")
+
+    def lookup(self, image: Image.Image, configuration, read_texts: Callable):
+        """
+        Returns the header words and column definitions of a known layout
+        matching the image, or None.
+
+        ``read_texts(region)`` is called to OCR the header band of a
+        candidate layout and returns text blocks in image coordinates.
+        """
+        key = layout_key(image, configuration)
+        with self._lock:
+            candidates = list(self._layouts.get(key, []))
+        for layout in candidates:
+            band = tuple(layout["band"])
+            distance = bin(difference_hash(image, band) ^ int(layout["hash"], 16))
+            if distance.count("1") > self.max_hash_distance:
+                continue
+            texts = {block["text"] for block in read_texts(band)}
+            if all(text in texts for text in configuration.headers):
+                with self._lock:
+                    self.hits += 1
+                return (
+                    copy.deepcopy(layout["header"]),
+                    copy.deepcopy(layout["column_definitions"]),
+                )
+            logging.debug(f"Layout {key} did not match, header texts: {texts}")
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def store(self, image: Image.Image, configuration, header, column_definitions):
+        band = header_band(image, header)
+        layout = {
+            "band": band,
+            "hash": format(difference_hash(image, band), "x"),
+            "header": copy.deepcopy(header),
+            "column_definitions": copy.deepcopy(column_definitions),
+        }
+        key = layout_key(image, configuration)
+        with self._lock:
+            layouts = self._layouts.setdefault(key, [])
+            layouts.insert(0, layout)
+            del layouts[self.max_layouts_per_key :]
+            if self.path:
+                self._write()
+
+    def clear(self):
+        with self._lock:
+            self._layouts.clear()
+            if self.path:
+                self._write()
+
+    def _write(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        handle, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+        with os.fdopen(handle, "w", encoding="utf-8") as outfile:
+            json.dump(self._layouts, outfile, ensure_ascii=False)
+        os.replace(temp_path, self.path)
+
+
+_cache = LayoutCache()
+
+
+def get_layout_cache():
+    return _cache
+
+
+def configure_layout_cache(
+    path: str = None, max_layouts_per_key: int = 8, max_hash_distance: int = 12
+):
+    """Replaces the layout cache used by ``ocr_table`` and returns it."""
+    global _cache
+    _cache = LayoutCache(
+        path=path,
+        max_layouts_per_key=max_layouts_per_key,
+        max_hash_distance=max_hash_distance,
+    )
+    return _cache
@@ -0,0 +1,189 @@
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager, nullcontext
+
+# Upper bounds of the word confidence histogram buckets
+CONFIDENCE_BUCKETS = (10, 20, 30, 40, 50, 60, 70, 80, 90, 100)
+
+
+class OCRMetrics:
+    """
+    Wall times and counters collected during one OCR call.
+
+    Stage times are accumulated, so a stage that runs several times during
+    the call (e.g. Tesseract for every column) reports its total time.
+    Stages running in parallel threads are summed as well.
+    """
+
+    def __init__(self, name: str = "ocr_table"):
+        self.name = name
+        self.stages = {}
+        self.counters = {}
+        self._confidences = [0] * 101
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - started)
+
+    def add_time(self, name: str, seconds: float):
+        with self._lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name: str, value: int = 1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def set(self, name: str, value):
+        with self._lock:
+            self.counters[name] = value
+
+    def record_confidences(self, confidences):
+        with self._lock:
+            for confidence in confidences:
+                self._confidences[min(max(int(confidence), 0), 100)] += 1
+
+    def confidence_summary(self):
+        count = sum(self._confidences)
+        summary = {"count": count, "histogram": {}}
+        lower = 0
+        for upper in CONFIDENCE_BUCKETS:
+            summary["histogram"][f"{lower}-{upper}"] = sum(
+                self._confidences[lower : upper + 1]
+            )
+            lower = upper + 1
+        if count:
+            values = [value for value, n in enumerate(self._confidences) if n]
+            summary["min"] = values[0]
+            summary["max"] = values[-1]
+            summary["mean"] = (
+                sum(value * n for value, n in enumerate(self._confidences)) / count
+            )
+        return summary
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "stages": dict(self.stages),
+                "counters": dict(self.counters),
+                "confidence": self.confidence_summary(),
+            }
+
+    def to_json(self, **kwargs):
+        return json.dumps(self.to_dict(), **kwargs)
+
+    def to_prometheus(self, prefix: str = "table_ocr"):
+        """Returns the metrics in the Prometheus text exposition format."""
+        data = self.to_dict()
+        call = _label(data["name"])
+        lines = [f"# TYPE {prefix}_stage_seconds gauge"]
+        for stage, seconds in data["stages"].items():
+            lines.append(
+                f'{prefix}_stage_seconds{{call="{call}",stage="{_label(stage)}"}} '
+                f"{seconds:.6f}"
+            )
+        lines.append(f"# TYPE {prefix}_count gauge")
+        for name, value in data["counters"].items():
+            lines.append(
+                f'{prefix}_count{{call="{call}",name="{_label(name)}"}} {value}'
+            )
+        lines.append(f"# TYPE {prefix}_word_confidence histogram")
+        with self._lock:
+            confidences = list(self._confidences)
+        for upper in CONFIDENCE_BUCKETS:
+            lines.append(
+                f'{prefix}_word_confidence_bucket{{call="{call}",le="{upper}"}} '
+                f"{sum(confidences[: upper + 1])}"
+            )
+        count = sum(confidences)
+        total = sum(value * n for value, n in enumerate(confidences))
+        lines.append(
+            f'{prefix}_word_confidence_bucket{{call="{call}",le="+Inf"}} {count}'
+        )
+        lines.append(f'{prefix}_word_confidence_sum{{call="{call}"}} {total}')
+        lines.append(f'{prefix}_word_confidence_count{{call="{call}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+def measure(metrics: OCRMetrics, stage: str):
+    """Times the stage when metrics are being collected."""
+    return metrics.stage(stage) if metrics is not None else nullcontext()
+
+
+class MetricsSink(ABC):
+    """Receives the metrics of every finished OCR call."""
+
+    @abstractmethod
+    def emit(self, metrics: OCRMetrics):
+        pass
+
+
+class LoggingSink(MetricsSink):
+    def __init__(self, level: int = logging.INFO):
+        self.level = level
+
+    def emit(self, metrics: OCRMetrics):
+        logging.log(self.level, f"OCR METRICS: {metrics.to_json()}")
+
+
+class JSONLinesSink(MetricsSink):
+    """Appends the metrics of each call as one JSON line to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def emit(self, metrics: OCRMetrics):
+        line = metrics.to_json(ensure_ascii=False)
+        with self._lock, open(self.path, "a", encoding="utf-8") as outfile:
+            outfile.write(line + "\n")
+
+
+class PrometheusTextSink(MetricsSink):
+    """
+    Writes the metrics of the latest call in Prometheus text format,
+    e.g. for the textfile collector of the node exporter.
+    """
+
+    def __init__(self, path: str, prefix: str = "table_ocr"):
+        self.path = path
+        self.prefix = prefix
+        self._lock = threading.Lock()
+
+    def emit(self, metrics: OCRMetrics):
+        text = metrics.to_prometheus(self.prefix)
+        with self._lock, open(self.path, "w", encoding="utf-8") as outfile:
+            outfile.write(text)
+
+
+_sinks = []
+
+
+def add_metrics_sink(sink: MetricsSink):
+    _sinks.append(sink)
+    return sink
+
+
+def remove_metrics_sink(sink: MetricsSink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+
+
+def emit_metrics(metrics: OCRMetrics):
+    for sink in list(_sinks):
+        try:
+            sink.emit(metrics)
+        except Exception:
+            logging.exception(f"Metrics sink {sink} failed")
@@ -0,0 +1,348 @@
+import asyncio
+import glob
+import logging
+import os
+import queue
+import threading
+import time
+from dataclasses import replace
+from typing import Iterable, Iterator, Union
+
+from PIL import Image
+
+from artifacts import submit_artifact
+from cache import cache_key, get_ocr_cache
+from configuration import TableConfiguration
+from engine import image_to_data
+from metrics import OCRMetrics, emit_metrics
+from OCRLibrary import (
+    TableResult,
+    combine_by_top_range,
+    complete_table,
+    get_window_coordinates,
+    locate_header,
+    ocr_table,
+    preprocessed_image_name,
+    save_image_to_artifacts,
+)
+from preprocess import load_image, preprocess_image, resolve_zoom_factor
+from words import WordStore
+
+# Marks the end of the items in a queue
+_DONE = object()
+
+
+class DirectorySource:
+    """
+    Replays the images of a directory in name order, e.g. captures saved
+    earlier, optionally ``interval`` seconds apart.
+    """
+
+    def __init__(self, directory: str, pattern: str = "*.png", interval: float = 0):
+        self.directory = directory
+        self.pattern = pattern
+        self.interval = interval
+
+    def __iter__(self):
+        paths = sorted(glob.glob(os.path.join(self.directory, self.pattern)))
+        for index, path in enumerate(paths):
+            if index and self.interval:
+                time.sleep(self.interval)
+            yield path
+
+
+class WindowCaptureSource:
+    """
+    Captures the window matching the locator every ``interval`` seconds,
+    ``count`` times or until the pipeline is stopped.
+
+    The captures are named by the locator, so that ``reuse_unchanged_regions``
+    can compare each capture to the previous one of the same window.
+    """
+
+    def __init__(self, locator: str, interval: float = 2.0, count: int = None):
+        self.locator = locator
+        self.interval = interval
+        self.count = count
+
+    def __iter__(self):
+        captured = 0
+        while self.count is None or captured < self.count:
+            started = time.monotonic()
+            image, _ = get_window_coordinates(self.locator)
+            yield self.locator, image
+            captured += 1
+            time.sleep(max(self.interval - (time.monotonic() - started), 0))
+
+
+class _Stage:
+    """Worker threads moving items from one queue to the next."""
+
+    def __init__(self, name, function, workers, inbox, outbox, stopped):
+        self.name = name
+        self.function = function
+        self.inbox = inbox
+        self.outbox = outbox
+        self.stopped = stopped
+        self._running = workers
+        self._lock = threading.Lock()
+        self.threads = [
+            threading.Thread(
+                target=self._work, name=f"ocr-pipeline-{name}-{i}", daemon=True
+            )
+            for i in range(workers)
+        ]
+
+    def start(self):
+        for thread in self.threads:
+            thread.start()
+
+    def _work(self):
+        while not self.stopped.is_set():
+            item = _get(self.inbox, self.stopped)
+            if item is _DONE:
+                # Let the other workers of the stage see the end too
+                _put(self.inbox, _DONE, self.stopped)
+                break
+            if item is None:
+                break
+            result = item[2]
+            if not isinstance(result, Exception):
+                try:
+                    result = self.function(item[1], result)
+                except Exception as error:  # reported per item
+                    logging.debug(f"{self.name} failed for {item[1]}: {error}")
+                    result = error
+            _put(self.outbox, (item[0], item[1], result), self.stopped)
+        with self._lock:
+            self._running -= 1
+            last = self._running == 0
+        if last:
+            _put(self.outbox, _DONE, self.stopped)
+
+
+def _get(inbox, stopped):
+    while not stopped.is_set():
+        try:
+            return inbox.get(timeout=0.1)
+        except queue.Empty:
+            continue
+    return None
+
+
+def _put(outbox, item, stopped):
+    # Blocks while the next stage is behind, which holds back this stage
+    while not stopped.is_set():
+        try:
+            outbox.put(item, timeout=0.1)
+            return
+        except queue.Full:
+            continue
+
+
+class OCRPipeline:
+    """
+    Reads tables from a stream of images with capture, preprocessing, OCR
+    and parsing running concurrently.
+
+    The stages are connected by queues of ``queue_size`` items, so a slow
+    stage holds back the ones before it instead of letting images pile up.
+    Every stage has its own number of worker threads.
+
+    Iterating the pipeline yields a ``TableResult`` per image, in the order
+    of the source when ``ordered`` is True and as soon as ready otherwise.
+    The pipeline can also be iterated with ``async for``.
+
+    Arguments:
+    - configuration: details on how OCR should be done
+    - source: iterable of PIL images, image paths or (name, image) pairs,
+      e.g. ``DirectorySource`` or ``WindowCaptureSource``. Paths and the
+      given names name the results and the sources of ``ocr_table``
+    - preprocess_workers, ocr_workers, parse_workers: threads per stage,
+      OCR defaults to the number of CPUs
+
+    Configurations reading tables by regions or columns, in tiles, by
+    changed regions or with the layout cache run ``ocr_table`` as a whole in
+    the OCR stage.
+    """
+
+    def __init__(
+        self,
+        configuration: TableConfiguration,
+        source: Iterable[Union[str, Image.Image, tuple]],
+        preprocess_workers: int = 1,
+        ocr_workers: int = None,
+        parse_workers: int = 1,
+        queue_size: int = 4,
+        ordered: bool = True,
+    ):
+        self.configuration = configuration
+        self.source = source
+        self.workers = {
+            "preprocess": preprocess_workers,
+            "ocr": ocr_workers or os.cpu_count() or 1,
+            "parse": parse_workers,
+        }
+        self.queue_size = queue_size
+        self.ordered = ordered
+
+    def __iter__(self) -> Iterator[TableResult]:
+        stopped = threading.Event()
+        queues = [queue.Queue(self.queue_size) for _ in range(4)]
+        whole_table = self._reads_whole_table()
+        stages = [
+            _Stage(name, function, self.workers[name], inbox, outbox, stopped)
+            for name, function, inbox, outbox in (
+                ("preprocess", self._preprocess, queues[0], queues[1]),
+                (
+                    "ocr",
+                    self._ocr_table if whole_table else self._ocr,
+                    queues[1],
+                    queues[2],
+                ),
+                ("parse", self._parse, queues[2], queues[3]),
+            )
+        ]
+        capture = threading.Thread(
+            target=self._capture,
+            args=(queues[0], stopped),
+            name="ocr-pipeline-capture",
+            daemon=True,
+        )
+        capture.start()
+        for stage in stages:
+            stage.start()
+        try:
+            yield from self._results(queues[3], stopped)
+        finally:
+            stopped.set()
+
+    async def __aiter__(self):
+        loop = asyncio.get_running_loop()
+        iterator = iter(self)
+        try:
+            while True:
+                result = await loop.run_in_executor(None, next, iterator, None)
+                if result is None:
+                    break
+                yield result
+        finally:
+            iterator.close()
+
+    def _reads_whole_table(self):
+        configuration = self.configuration
+        return (
+            configuration.region_of_interest
+            or configuration.column_ocr
+            or configuration.tiled_ocr
+            or configuration.reuse_unchanged_regions
+            or configuration.use_layout_cache
+        )
+
+    def _capture(self, outbox, stopped):
+        try:
+            for index, image_in in enumerate(self.source):
+                if stopped.is_set():
+                    return
+                if isinstance(image_in, tuple):
+                    name, image_in = image_in
+                else:
+                    name = image_in if isinstance(image_in, str) else None
+                _put(outbox, (index, name, image_in), stopped)
+        except Exception as error:
+            logging.error(f"Image source failed: {error}")
+        _put(outbox, _DONE, stopped)
+
+    def _results(self, inbox, stopped):
+        pending = {}
+        expected = 0
+        while True:
+            item = _get(inbox, stopped)
+            if item is _DONE or item is None:
+                break
+            index, name, result = item
+            if isinstance(result, Exception):
+                result = TableResult(index, name, error=result)
+            else:
+                result = TableResult(index, name, table=result)
+            if not self.ordered:
+                yield result
+                continue
+            pending[index] = result
+            while expected in pending:
+                yield pending.pop(expected)
+                expected += 1
+        for index in sorted(pending):
+            yield pending[index]
+
+    def _preprocess(self, name, image_in):
+        metrics = OCRMetrics("ocr_table")
+        started = time.perf_counter()
+        if self._reads_whole_table():
+            return image_in, metrics, started
+        with metrics.stage("load"):
+            image = load_image(image_in)
+        configuration = self.configuration
+        zoom_factor = resolve_zoom_factor(image, configuration)
+        if zoom_factor != configuration.zoom_factor:
+            configuration = replace(configuration, zoom_factor=zoom_factor)
+        target_image, image = preprocess_image(image, configuration, metrics)
+        image_out = preprocessed_image_name(configuration)
+        if image_out:
+            submit_artifact(save_image_to_artifacts, target_image, image_out)
+        return target_image, image, configuration, metrics, started
+
+    def _ocr_table(self, name, item):
+        image_in, metrics, started = item
+        return ocr_table(self.configuration, image_in, source=name)
+
+    def _ocr(self, name, item):
+        target_image, image, configuration, metrics, started = item
+        metrics.count("ocr_calls")
+        metrics.count("ocr_pixels", target_image.width * target_image.height)
+        cache = get_ocr_cache() if configuration.use_ocr_cache else None
+        key = cache_key(target_image, configuration, None) if cache else None
+        text_blocks = cache.get(key) if cache else None
+        if text_blocks is not None:
+            metrics.count("cache_hits")
+            words = WordStore.from_dicts(text_blocks)
+            return words, image, configuration, metrics, started
+        with metrics.stage("tesseract"):
+            ocr_data = image_to_data(target_image, configuration)
+        metrics.record_confidences(
+            conf
+            for text, conf in zip(ocr_data["text"], ocr_data["conf"])
+            if text.strip()
+        )
+        with metrics.stage("parse"):
+            words = WordStore.from_ocr_data(
+                ocr_data, configuration.zoom_factor, configuration.confidence_level
+            )
+        if cache:
+            cache.put(key, words.to_dicts())
+        return words, image, configuration, metrics, started
+
+    def _parse(self, name, item):
+        if not isinstance(item, tuple):
+            # The OCR stage read the whole table
+            return item
+        words, image, configuration, metrics, started = item
+        metrics.count("words", len(words))
+        with metrics.stage("row_grouping"):
+            rows = combine_by_top_range(words, tolerance=configuration.row_tolerance)
+        _, header, column_definitions = locate_header(rows, configuration, metrics)
+        table = complete_table(
+            configuration, image, rows, header, column_definitions, metrics, None
+        )
+        metrics.add_time("total", time.perf_counter() - started)
+        emit_metrics(metrics)
+        return table
+
+
+def stream_tables(
+    configuration: TableConfiguration,
+    source: Iterable[Union[str, Image.Image, tuple]],
+    **settings,
+) -> Iterator[TableResult]:
+    """Yields a ``TableResult`` per image of the source, see ``OCRPipeline``."""
+    return iter(OCRPipeline(configuration, source, **settings))
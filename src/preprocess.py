@@ -1,15 +1,29 @@
+import hashlib
 import logging
+import threading
+from collections import OrderedDict
+
+import numpy as np
 from PIL import Image, ImageFilter, ImageEnhance
 from configuration import TableConfiguration
+from metrics import measure
 from typing import Union
 
+# Identity ramp used to evaluate PIL point operations once per value
+# instead of once per pixel.
+_RAMP = np.arange(256, dtype=np.uint8)
+# Zoomed grayscale images by image content and zoom, see cache_zoomed_images
+_zoomed_images = None
+_zoomed_images_max = 0
+_zoomed_images_lock = threading.Lock()
+
 
 def grayscale_image(image):
     return image.convert("L")
 
 
 def get_binary(image, threshold=100):
-    return image.point(lambda p: p > threshold and 255)
+    return image.point(threshold_lut(threshold, min_color=0, max_color=255).tolist())
 
 
 def zoom_image(image, configuration):
@@ -61,18 +75,13 @@ def binarize_image(image, configuration: Union[TableConfiguration, int]):
         if isinstance(configuration, TableConfiguration)
         else False
     )
-    logging.warning(f"threshold_value: {threshold_value}")
-    logging.warning(f"invert_colors: {invert_colors}")
-    logging.warning(f"image: {type(image)}")
-    min_color = 255 if invert_colors else 0
-    max_color = 0 if invert_colors else 255
-    # target_image = target_image.point(lambda p: p if p <= threshold else 255)
+    logging.debug(f"threshold_value: {threshold_value}")
+    logging.debug(f"invert_colors: {invert_colors}")
+    logging.debug(f"image: {type(image)}")
     # Apply thresholding
     if threshold_value > 0:
-        preprocessed_image = image.point(
-            lambda p: max_color if p > threshold_value else min_color, "1"
-        )
-        return preprocessed_image
+        lut = threshold_lut(threshold_value, invert_colors=invert_colors)
+        return image.point(lut.tolist(), "1")
     else:
         return image
 
@@ -82,19 +91,193 @@ def noise_reduct_image(image):
     return image.filter(ImageFilter.GaussianBlur(1))
 
 
-def preprocess_image(
-    image_in: Union[str, Image.Image], configuration: TableConfiguration
+def blend_lut(degenerate: int, factor: float):
+    """
+    Returns the 256-entry lookup table of ``Image.blend(degenerate, image, factor)``.
+
+    ``ImageEnhance.Brightness`` and ``ImageEnhance.Contrast`` are both blends
+    against a constant image, so blending an identity ramp through PIL gives
+    a table with exactly the same rounding and clipping as the enhancers.
+    """
+    ramp = Image.frombytes("L", (256, 1), _RAMP.tobytes())
+    blended = Image.blend(Image.new("L", (256, 1), degenerate), ramp, factor)
+    return np.frombuffer(blended.tobytes(), dtype=np.uint8)
+
+
+def brightness_lut(brightness: float):
+    return blend_lut(0, brightness)
+
+
+def contrast_lut(contrast: float, mean: int):
+    return blend_lut(mean, contrast)
+
+
+def threshold_lut(
+    threshold: int,
+    invert_colors: bool = False,
+    min_color: int = 0,
+    max_color: int = 255,
 ):
-    original_target_image = (
+    if invert_colors:
+        min_color, max_color = max_color, min_color
+    return np.where(_RAMP > threshold, max_color, min_color).astype(np.uint8)
+
+
+def lut_mean(histogram, lut):
+    """
+    Mean pixel value of an image after ``lut`` has been applied to it,
+    computed from the histogram of the image before the lookup.
+
+    Rounded the same way as ``ImageEnhance.Contrast`` rounds the mean.
+    """
+    mapped = np.bincount(lut, weights=histogram, minlength=256).astype(np.int64)
+    count = int(mapped.sum())
+    return int(int(np.dot(mapped, np.arange(256, dtype=np.int64))) / count + 0.5)
+
+
+def tone_lut(histogram, configuration):
+    """Brightness and contrast fused into one lookup table."""
+    brightness = brightness_lut(configuration.brightness)
+    contrast = contrast_lut(configuration.contrast, lut_mean(histogram, brightness))
+    return contrast[brightness]
+
+
+def apply_point_operations(image, configuration, metrics=None):
+    """
+    Applies brightness, contrast, sharpening and binarization to a zoomed
+    grayscale image.
+
+    The point operations are fused into precomputed lookup tables, so
+    without sharpening the whole chain is a single pass over the pixels.
+    Sharpening is a neighbourhood filter and splits the chain in two.
+    The result is pixel-identical to running ``brighten_image``,
+    ``contrast_image``, ``sharpen_image`` and ``binarize_image`` in order.
+    """
+    with measure(metrics, "point_operations"):
+        lut = tone_lut(image.histogram(), configuration)
+        binarize = configuration.threshold > 0
+        if binarize:
+            binary = threshold_lut(
+                configuration.threshold, invert_colors=configuration.invert_colors
+            )
+        if binarize and not configuration.sharpen:
+            return image.point(binary[lut].tolist(), "1")
+        image = image.point(lut.tolist())
+    if configuration.sharpen:
+        with measure(metrics, "sharpen"):
+            image = sharpen_image(image, configuration)
+    if binarize:
+        with measure(metrics, "point_operations"):
+            image = image.point(binary.tolist(), "1")
+    return image
+
+
+def estimate_text_height(image, strip_width: int = 64):
+    """
+    Estimates the height of text lines in pixels.
+
+    The image is cut into vertical strips and the rows containing ink are
+    found for each strip. The runs of consecutive ink rows are the text lines
+    of that strip, so a vertical border only affects a single strip.
+
+    Returns the median run height or None if no text-like runs are found.
+    """
+    pixels = np.asarray(image.convert("L"))
+    height, width = pixels.shape
+    background = int(np.bincount(pixels.ravel(), minlength=256).argmax())
+    ink = np.abs(pixels.astype(np.int16) - background) > 64
+    strips = max(width // strip_width, 1)
+    ink = ink[:, : strips * strip_width].reshape(height, strips, -1).any(axis=2)
+    padded = np.zeros((strips, height + 2), dtype=np.int8)
+    padded[:, 1:-1] = ink.T
+    edges = np.diff(padded, axis=1)
+    # nonzero walks strip by strip, so starts and ends pair up in order
+    runs = np.nonzero(edges == -1)[1] - np.nonzero(edges == 1)[1]
+    # Drop specks, underlines and large graphics
+    runs = runs[(runs >= 3) & (runs <= max(height // 4, 3))]
+    if runs.size == 0:
+        return None
+    return float(np.median(runs))
+
+
+def resolve_zoom_factor(image, configuration):
+    """
+    Returns the zoom factor for the image.
+
+    With ``adaptive_zoom`` the smallest zoom bringing text lines to about
+    ``target_text_height`` pixels is chosen, limited by ``min_zoom_factor``
+    and ``max_zoom_factor``. Otherwise ``zoom_factor`` is returned as is.
+    """
+    if not configuration.adaptive_zoom:
+        return configuration.zoom_factor
+    text_height = estimate_text_height(image)
+    if text_height is None:
+        return configuration.zoom_factor
+    zoom_factor = configuration.target_text_height / text_height
+    zoom_factor = min(
+        max(zoom_factor, configuration.min_zoom_factor),
+        configuration.max_zoom_factor,
+    )
+    # Quarter steps keep results stable for small measurement differences
+    return max(round(zoom_factor * 4) / 4, 0.25)
+
+
+def load_image(image_in: Union[str, Image.Image]):
+    return (
         Image.open(image_in).convert("RGBA") if isinstance(image_in, str) else image_in
     )
 
-    preprocessed_image = grayscale_image(original_target_image)
-    preprocessed_image = zoom_image(preprocessed_image, configuration)
-    preprocessed_image = brighten_image(preprocessed_image, configuration)
-    preprocessed_image = contrast_image(preprocessed_image, configuration)
-    preprocessed_image = sharpen_image(preprocessed_image, configuration)
-    preprocessed_image = binarize_image(preprocessed_image, configuration)
+
+def cache_zoomed_images(max_items: int = 8):
+    """
+    Keeps the zoomed grayscale versions of the last ``max_items`` images in
+    this process, so that preprocessing an image again with other point
+    operations skips the zoom. 0 turns the cache off.
+    """
+    global _zoomed_images, _zoomed_images_max
+    with _zoomed_images_lock:
+        _zoomed_images = OrderedDict() if max_items > 0 else None
+        _zoomed_images_max = max_items
+
+
+def _zoom_key(image, configuration):
+    digest = hashlib.blake2b(image.tobytes(), digest_size=16).hexdigest()
+    return (digest, image.mode, image.size, configuration.zoom_factor)
+
+
+def preprocess_image(
+    image_in: Union[str, Image.Image],
+    configuration: TableConfiguration,
+    metrics=None,
+):
+    with measure(metrics, "load"):
+        original_target_image = load_image(image_in)
+
+    key = None
+    preprocessed_image = None
+    # The cache may be replaced or turned off by another thread meanwhile,
+    # so the one seen here is used throughout
+    with _zoomed_images_lock:
+        zoomed_images = _zoomed_images
+    if zoomed_images is not None:
+        key = _zoom_key(original_target_image, configuration)
+        with _zoomed_images_lock:
+            preprocessed_image = zoomed_images.get(key)
+            if preprocessed_image is not None:
+                zoomed_images.move_to_end(key)
+    if preprocessed_image is None:
+        with measure(metrics, "grayscale"):
+            preprocessed_image = grayscale_image(original_target_image)
+        with measure(metrics, "zoom"):
+            preprocessed_image = zoom_image(preprocessed_image, configuration)
+        if key is not None:
+            with _zoomed_images_lock:
+                zoomed_images[key] = preprocessed_image
+                while len(zoomed_images) > _zoomed_images_max:
+                    zoomed_images.popitem(last=False)
+    preprocessed_image = apply_point_operations(
+        preprocessed_image, configuration, metrics
+    )
 
     if configuration.show_pre_ocr_image:
         preprocessed_image.show()
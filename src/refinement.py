@@ -0,0 +1,167 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+
+# Validators that can be given by name with set_column_validator
+VALIDATOR_PATTERNS = {
+    "date": r"\d{1,4}[./-]\d{1,2}[./-]\d{1,4}",
+    "amount": r"[-+]?[$€£]?\d{1,3}(?:[ ,.]?\d{3})*(?:[.,]\d{1,2})?(?: ?(?:[$€£]|[A-Z]{3}))?",
+    "integer": r"[-+]?\d+",
+}
+# Pixels kept above and below the words of a row in the cell crops
+CELL_PADDING = 4
+
+
+def compile_validators(column_validators: Dict[str, str]):
+    """Compiles the validators of the columns, names are looked up first."""
+    validators = {}
+    for column_name, pattern in column_validators.items():
+        try:
+            validators[column_name] = re.compile(
+                VALIDATOR_PATTERNS.get(pattern, pattern)
+            )
+        except re.error as error:
+            raise ValueError(
+                f"Invalid validator for column {column_name}: {error}"
+            ) from error
+    return validators
+
+
+def cell_text(words: List[dict]):
+    return " ".join(word["text"] for word in words)
+
+
+def cell_score(words: List[dict], validator=None):
+    """
+    Orders the readings of a cell: passing the validator comes first, then
+    having text and last the mean confidence of the words.
+    """
+    valid = validator is None or validator.fullmatch(cell_text(words)) is not None
+    confidence = sum(word["conf"] for word in words) / len(words) if words else -1
+    return valid, bool(words), confidence
+
+
+def acceptable(words: List[dict], new_words: List[dict], validator, confidence: int):
+    """
+    Tells if a new reading of a cell may replace the first one: all of its
+    words reach ``confidence`` and, without a validator to check the text,
+    it has at least as many words as the first reading.
+    """
+    if not new_words or min(word["conf"] for word in new_words) < confidence:
+        return False
+    return validator is not None or len(new_words) >= len(words)
+
+
+def cells_to_refine(
+    rows,
+    cells,
+    column_definitions,
+    validators,
+    confidence: int,
+    empty_cells: bool = False,
+):
+    """
+    Returns (row index, column name, words) of the cells that have a word
+    below ``confidence`` or a text failing the column validator, and of the
+    cells without words when ``empty_cells``.
+    """
+    candidates = []
+    for row_index, row_cells in enumerate(cells):
+        for column_name in column_definitions:
+            words = row_cells.get(column_name, [])
+            validator = validators.get(column_name)
+            if (
+                (not words and empty_cells)
+                or (words and min(word["conf"] for word in words) < confidence)
+                or (validator and not validator.fullmatch(rows[row_index][column_name]))
+            ):
+                candidates.append((row_index, column_name, words))
+    return candidates
+
+
+def cell_box(row_cells, column, image_size, padding: int = CELL_PADDING):
+    """The column across the words of the row as (left, top, right, bottom)."""
+    words = [word for column_words in row_cells.values() for word in column_words]
+    top = min(word["top"] for word in words) - padding
+    bottom = max(word["bottom"] for word in words) + padding
+    return (
+        max(int(column["left"]), 0),
+        max(int(top), 0),
+        min(int(column["left"] + column["width"]), image_size[0]),
+        min(int(bottom), image_size[1]),
+    )
+
+
+def refine_cells(
+    image_size: tuple,
+    rows: List[dict],
+    cells: List[Dict[str, list]],
+    column_definitions,
+    configuration,
+    read_cell: Callable,
+    metrics=None,
+):
+    """
+    Reads the doubtful cells of a table again and keeps the best readings.
+
+    The cells with words below ``refinement_confidence`` or failing the
+    validator of their column in ``column_validators``, and the cells
+    without words with ``refine_empty_cells``, are read with every settings
+    of ``refinement_variants`` in parallel, ``refinement_workers`` at a
+    time. A new reading replaces the text of the cell when it is
+    ``acceptable`` and scores better by ``cell_score`` than the first one.
+
+    Arguments:
+    - image_size: width and height of the image the table was read from
+    - rows: table rows from ``build_table``, changed in place
+    - cells: the words of every cell of the rows by column name
+    - column_definitions: finalized column definitions
+    - configuration: table configuration
+    - read_cell: called with the cell box, the column name and the variant,
+      returns the words read from the box
+    - metrics: counts the refined and improved cells
+
+    Returns the rows.
+    """
+    validators = compile_validators(configuration.column_validators)
+    candidates = cells_to_refine(
+        rows,
+        cells,
+        column_definitions,
+        validators,
+        configuration.refinement_confidence,
+        configuration.refine_empty_cells,
+    )
+    if metrics is not None:
+        metrics.count("refined_cells", len(candidates))
+    if not candidates or not configuration.refinement_variants:
+        return rows
+    jobs = [
+        (
+            cell_box(cells[row_index], column_definitions[column_name], image_size),
+            column_name,
+            variant,
+        )
+        for row_index, column_name, _ in candidates
+        for variant in configuration.refinement_variants
+    ]
+    with ThreadPoolExecutor(max_workers=configuration.refinement_workers) as executor:
+        readings = iter(list(executor.map(lambda job: read_cell(*job), jobs)))
+    for row_index, column_name, words in candidates:
+        validator = validators.get(column_name)
+        best = cell_score(words, validator)
+        best_words = None
+        for _ in configuration.refinement_variants:
+            new_words = next(readings)
+            if not acceptable(
+                words, new_words, validator, configuration.refinement_confidence
+            ):
+                continue
+            score = cell_score(new_words, validator)
+            if score > best:
+                best, best_words = score, new_words
+        if best_words is not None:
+            rows[row_index][column_name] = cell_text(best_words)
+            if metrics is not None:
+                metrics.count("improved_cells")
+    return rows
@@ -0,0 +1,189 @@
+import bisect
+import logging
+from typing import Iterable, Union
+
+import numpy as np
+from PIL import Image
+
+from configuration import TableConfiguration
+from OCRLibrary import (
+    REGION_PADDING,
+    build_table,
+    combine_by_top_range,
+    find_words,
+    find_words_in_region,
+    get_table_region,
+    locate_header,
+    read_table_header,
+)
+from preprocess import load_image
+
+# Width the rows of the table body are reduced to for scroll detection
+SIGNATURE_WIDTH = 128
+
+
+def row_signatures(image: Image.Image, region: tuple, width: int = SIGNATURE_WIDTH):
+    """
+    Returns the region of the image as a grayscale array that is
+    downscaled horizontally only, so that every pixel row is kept.
+    """
+    gray = image.convert("L").crop(region)
+    gray = gray.resize((min(width, gray.width), gray.height), Image.BOX)
+    return np.asarray(gray, dtype=np.float32)
+
+
+def detect_scroll_offset(
+    previous: np.ndarray, current: np.ndarray, min_overlap: int = None
+):
+    """
+    Finds how many pixels the content has scrolled up between two captures.
+
+    Every shift is scored by the mean absolute difference of the overlapping
+    rows, where row ``y`` of the current capture should equal row
+    ``y + shift`` of the previous one.
+
+    Returns the best shift and its score (0 means identical overlap).
+    """
+    height = min(len(previous), len(current))
+    if min_overlap is None:
+        min_overlap = max(height // 3, 1)
+    best_shift, best_score = 0, float("inf")
+    for shift in range(0, max(height - min_overlap, 0) + 1):
+        score = float(np.abs(previous[shift:height] - current[: height - shift]).mean())
+        if score < best_score:
+            best_shift, best_score = shift, score
+    return best_shift, best_score
+
+
+class ScrollingTableSession:
+    """
+    Reads a table that is longer than one screen from successive captures.
+
+    The first capture is read as a whole to find the header and the columns,
+    and its rows are taken from the same reading.
+    For every following capture, the scroll offset is detected by correlating
+    the table body with the previous capture and only the newly exposed strip
+    at the bottom, plus ``overlap`` pixels above it, is OCR'd.
+
+    Rows are collected into ``table`` with their y coordinates relative to the
+    first capture. A row read again at the overlap is kept once, using the
+    reading that was further from the edge of its OCR region.
+
+    The table is expected to scroll down and stay at the same place in the
+    captures, e.g. a grid inside an application window.
+    """
+
+    def __init__(
+        self,
+        configuration: TableConfiguration,
+        overlap: int = None,
+        max_difference: float = 12.0,
+    ):
+        self.configuration = configuration
+        self.overlap = (
+            overlap
+            if overlap is not None
+            else 2 * configuration.row_tolerance + REGION_PADDING
+        )
+        self.max_difference = max_difference
+        self.table = []
+        self.header = None
+        self.column_definitions = None
+        self.region = None
+        self.scroll_offset = 0
+        self._signatures = None
+        self._ys = []
+        self._distances = []
+
+    def add_capture(self, image_in: Union[str, Image.Image]):
+        """
+        Adds the next capture of the table.
+
+        Returns the rows that were added to the table by this capture.
+        """
+        image = load_image(image_in)
+        if self.region is None:
+            return self._read_first(image)
+        signatures = row_signatures(image, self.region)
+        shift, difference = detect_scroll_offset(self._signatures, signatures)
+        self._signatures = signatures
+        left, top, right, bottom = self.region
+        if difference > self.max_difference:
+            logging.warning(
+                f"Capture does not overlap the previous one ({difference:.1f}), "
+                "reading the whole table body"
+            )
+            shift = bottom - top
+        if shift == 0:
+            return []
+        self.scroll_offset += shift
+        strip_top = max(bottom - shift - self.overlap, top)
+        return self._read_region(image, (left, strip_top, right, bottom))
+
+    def _read_first(self, image):
+        configuration = self.configuration
+        rows = None
+        if configuration.region_of_interest:
+            image, header, column_definitions = read_table_header(image, configuration)
+        else:
+            words, image = find_words(image_in=image, configuration=configuration)
+            rows = combine_by_top_range(words, tolerance=configuration.row_tolerance)
+            _, header, column_definitions = locate_header(rows, configuration)
+        self.header = header
+        self.column_definitions = column_definitions
+        self.region = get_table_region(image, configuration, header, column_definitions)
+        self._signatures = row_signatures(image, self.region)
+        if rows is None:
+            return self._read_region(image, self.region)
+        # The whole image was read already, like ocr_table uses it
+        return self._add_rows(image, rows, self.region)
+
+    def _read_region(self, image, region):
+        words = find_words_in_region(image, region, self.configuration)
+        rows = combine_by_top_range(words, tolerance=self.configuration.row_tolerance)
+        return self._add_rows(image, rows, region)
+
+    def _add_rows(self, image, rows, region):
+        table = build_table(
+            rows,
+            self.column_definitions,
+            self.configuration,
+            table_top=self.header[0]["bottom"],
+            table_bottom=image.height,
+        )
+        return self._merge(table, region)
+
+    def _merge(self, rows, region):
+        added = []
+        tolerance = self.configuration.row_tolerance
+        for row in rows:
+            distance = min(row["y"] - region[1], region[3] - row["y"])
+            row["y"] += self.scroll_offset
+            index = bisect.bisect_left(self._ys, row["y"] - tolerance)
+            if index < len(self._ys) and abs(self._ys[index] - row["y"]) <= tolerance:
+                # Same row read again, keep the reading further from a cut
+                if distance > self._distances[index]:
+                    row["y"] = self._ys[index]
+                    self.table[index] = row
+                    self._distances[index] = distance
+                continue
+            self.table.insert(index, row)
+            self._ys.insert(index, row["y"])
+            self._distances.insert(index, distance)
+            added.append(row)
+        return added
+
+
+def read_scrolling_table(
+    configuration: TableConfiguration,
+    captures: Iterable[Union[str, Image.Image]],
+):
+    """
+    Reads a table from successive captures of a scrolling table.
+
+    Returns the stitched table with y coordinates relative to the first capture.
+    """
+    session = ScrollingTableSession(configuration)
+    for capture in captures:
+        session.add_capture(capture)
+    return session.table
@@ -0,0 +1,258 @@
+from dataclasses import dataclass, field, replace
+from typing import List, Union
+
+import numpy as np
+from PIL import Image
+
+from configuration import TableConfiguration
+from preprocess import load_image, preprocess_image
+
+# Pixels that differ this much from the background color are ink
+INK_CONTRAST = 64
+
+
+@dataclass
+class TableStructure:
+    """
+    Rows and columns of a table found from its ruling lines and gutters.
+
+    ``rows`` are (top, bottom) and ``columns`` (left, right) pixel ranges
+    around the ink of the rows and columns, end exclusive. ``ink`` tells
+    which cells have ink and ``cell_boxes`` are the cells grown by the
+    padding without reaching the neighbouring rows, columns or lines.
+    """
+
+    rows: List[tuple]
+    columns: List[tuple]
+    ink: np.ndarray
+    horizontal_lines: List[tuple] = field(default_factory=list)
+    vertical_lines: List[tuple] = field(default_factory=list)
+    padded_rows: List[tuple] = field(default_factory=list)
+    padded_columns: List[tuple] = field(default_factory=list)
+
+    @property
+    def ruled(self):
+        return len(self.horizontal_lines) >= 2 or len(self.vertical_lines) >= 2
+
+    def cell_boxes(self, only_ink: bool = True):
+        """
+        Yields (row index, column index, (left, top, right, bottom)) of the
+        cells, by default only of the cells with ink.
+        """
+        for row_index, (top, bottom) in enumerate(self.padded_rows):
+            for column_index, (left, right) in enumerate(self.padded_columns):
+                if only_ink and not self.ink[row_index, column_index]:
+                    continue
+                yield row_index, column_index, (left, top, right, bottom)
+
+    def locate(self, x, y):
+        """
+        Returns the row and column indexes of the cells containing the
+        points as arrays, -1 where a point is outside of all cells.
+        """
+        return (
+            _locate(np.asarray(y), self.padded_rows),
+            _locate(np.asarray(x), self.padded_columns),
+        )
+
+
+def _locate(values, ranges):
+    if not ranges:
+        return np.full(values.shape, -1)
+    starts = np.array([start for start, _ in ranges])
+    ends = np.array([end for _, end in ranges])
+    indexes = np.searchsorted(starts, values, side="right") - 1
+    inside = (indexes >= 0) & (values < ends[np.maximum(indexes, 0)])
+    return np.where(inside, indexes, -1)
+
+
+def ink_mask(image: Image.Image):
+    """Pixels differing from the most common color by ``INK_CONTRAST``."""
+    pixels = np.asarray(image.convert("L"))
+    background = int(np.bincount(pixels.ravel(), minlength=256).argmax())
+    return np.abs(pixels.astype(np.int16) - background) > INK_CONTRAST
+
+
+def find_runs(flags: np.ndarray, offset: int = 0):
+    """Returns the (start, end) ranges of consecutive True values."""
+    padded = np.zeros(flags.size + 2, dtype=np.int8)
+    padded[1:-1] = flags
+    edges = np.diff(padded)
+    starts = np.flatnonzero(edges == 1) + offset
+    ends = np.flatnonzero(edges == -1) + offset
+    return list(zip(starts.tolist(), ends.tolist()))
+
+
+def split_by_gaps(flags: np.ndarray, min_gap: int, offset: int = 0):
+    """
+    Returns the (start, end) ranges of True values, joining ranges that are
+    separated by fewer than ``min_gap`` False values.
+    """
+    runs = find_runs(flags, offset)
+    if not runs:
+        return []
+    starts = np.array([start for start, _ in runs])
+    ends = np.array([end for _, end in runs])
+    breaks = np.flatnonzero(starts[1:] - ends[:-1] >= min_gap)
+    first = np.concatenate(([0], breaks + 1))
+    last = np.concatenate((breaks, [len(runs) - 1]))
+    return list(zip(starts[first].tolist(), ends[last].tolist()))
+
+
+def find_ruling_lines(mask: np.ndarray, axis: int, line_ratio: float):
+    """
+    Returns the (start, end) ranges of the lines along ``axis`` that have ink
+    in at least ``line_ratio`` of their length: rows for axis 1 and columns
+    for axis 0.
+    """
+    length = mask.shape[axis]
+    if length == 0:
+        return []
+    profile = np.count_nonzero(mask, axis=axis)
+    return find_runs(profile >= line_ratio * length)
+
+
+def _segments(lines, start, end):
+    """The ranges between the lines within start and end."""
+    segments = []
+    for line_start, line_end in lines:
+        if line_start > start:
+            segments.append((start, line_start))
+        start = max(start, line_end)
+    if end > start:
+        segments.append((start, end))
+    return segments
+
+
+def _find_bands(profile, lines, start, end, min_gap, split_segments):
+    """
+    Ink ranges of the profile between the lines. The ranges between two
+    lines are split further at gaps of ``min_gap`` when ``split_segments``.
+    """
+    bands = []
+    for segment_start, segment_end in _segments(lines, start, end):
+        flags = profile[segment_start:segment_end]
+        if split_segments:
+            bands.extend(split_by_gaps(flags, min_gap, segment_start))
+        elif flags.any():
+            ink = np.flatnonzero(flags)
+            bands.append(
+                (segment_start + int(ink[0]), segment_start + int(ink[-1]) + 1)
+            )
+    return bands
+
+
+def pad_ranges(ranges, lines, padding: int, size: int):
+    """
+    Grows the ranges by ``padding`` pixels on both sides, up to halfway to
+    the neighbouring range and never over a line.
+    """
+    padded = []
+    for index, (start, end) in enumerate(ranges):
+        low = start - padding
+        high = end + padding
+        if index > 0:
+            low = max(low, (ranges[index - 1][1] + start) // 2)
+        if index + 1 < len(ranges):
+            high = min(high, (end + ranges[index + 1][0] + 1) // 2)
+        for line_start, line_end in lines:
+            if line_end <= start:
+                low = max(low, line_end)
+            elif line_start >= end:
+                high = min(high, line_start)
+        padded.append((max(low, 0), min(high, size)))
+    return padded
+
+
+def detect_structure(
+    image_in: Union[str, Image.Image],
+    configuration: TableConfiguration,
+    padding: int = 4,
+    metrics=None,
+):
+    """
+    Finds the row bands and the column boundaries of a table without OCR.
+
+    The image is preprocessed like for OCR but without zoom, so that the
+    structure is in original image coordinates. Rows and columns whose ink
+    covers at least ``structure_line_ratio`` of the table are ruling lines.
+    With two or more lines in a direction, the ranges between the lines
+    are the rows or columns. Otherwise they are split at blank gutters of
+    at least ``structure_row_gap`` or ``structure_column_gap`` pixels.
+
+    Returns a ``TableStructure``.
+    """
+    image = load_image(image_in)
+    binary, _ = preprocess_image(
+        image,
+        replace(
+            configuration,
+            zoom_factor=1,
+            adaptive_zoom=False,
+            show_pre_ocr_image=False,
+        ),
+        metrics,
+    )
+    mask = ink_mask(binary)
+    height, width = mask.shape
+    ink_rows = np.flatnonzero(mask.any(axis=1))
+    ink_columns = np.flatnonzero(mask.any(axis=0))
+    if ink_rows.size == 0:
+        return TableStructure([], [], np.zeros((0, 0), dtype=bool))
+    top, bottom = int(ink_rows[0]), int(ink_rows[-1]) + 1
+    left, right = int(ink_columns[0]), int(ink_columns[-1]) + 1
+    table = mask[top:bottom, left:right]
+
+    line_ratio = configuration.structure_line_ratio
+    horizontal_lines = [
+        (start + top, end + top)
+        for start, end in find_ruling_lines(table, 1, line_ratio)
+    ]
+    vertical_lines = [
+        (start + left, end + left)
+        for start, end in find_ruling_lines(table, 0, line_ratio)
+    ]
+    # The lines are not content
+    text = mask.copy()
+    for start, end in horizontal_lines:
+        text[start:end] = False
+    for start, end in vertical_lines:
+        text[:, start:end] = False
+
+    rows = _find_bands(
+        text.any(axis=1),
+        horizontal_lines,
+        top,
+        bottom,
+        configuration.structure_row_gap,
+        split_segments=len(horizontal_lines) < 2,
+    )
+    if not rows:
+        return TableStructure(
+            [], [], np.zeros((0, 0), dtype=bool), horizontal_lines, vertical_lines
+        )
+    # Ink of every row band in one reduction, a column gutter must be blank
+    # on all rows
+    edges = np.array([edge for row in rows for edge in row])
+    padded_text = np.vstack((text, np.zeros((1, width), dtype=bool)))
+    row_ink = np.logical_or.reduceat(padded_text, edges, axis=0)[::2]
+    columns = _find_bands(
+        row_ink.any(axis=0),
+        vertical_lines,
+        left,
+        right,
+        configuration.structure_column_gap,
+        split_segments=len(vertical_lines) < 2,
+    )
+    edges = np.array([edge for column in columns for edge in column])
+    padded_ink = np.hstack((row_ink, np.zeros((len(rows), 1), dtype=bool)))
+    cell_ink = np.logical_or.reduceat(padded_ink, edges, axis=1)[:, ::2]
+    return TableStructure(
+        rows=rows,
+        columns=columns,
+        ink=cell_ink,
+        horizontal_lines=horizontal_lines,
+        vertical_lines=vertical_lines,
+        padded_rows=pad_ranges(rows, horizontal_lines, padding, height),
+        padded_columns=pad_ranges(columns, vertical_lines, padding, width),
+    )
@@ -0,0 +1,135 @@
+from collections.abc import Sequence
+from typing import Dict, Iterable, List
+
+# Keys holding the clickable point of a row, moved by offset_coordinates
+COORDINATE_COLUMNS = ("x", "y")
+
+_MISSING = object()
+
+
+class OCRTable(Sequence):
+    """
+    Rows read by ``ocr_table`` stored column by column, returned with
+    ``as_table=True``.
+
+    The table can be iterated, indexed and compared to a list of row dicts,
+    and every access returns new dicts. Changing a returned dict does not
+    change the table, use ``to_list`` for rows that can be changed or
+    written as JSON.
+
+    Lookups with ``find`` build a hash index of each queried column on first
+    use, so repeated lookups do not scan the rows.
+    """
+
+    def __init__(self, rows: Iterable[dict] = (), columns: List[str] = None):
+        rows = list(rows)
+        if columns is None:
+            columns = list(dict.fromkeys(key for row in rows for key in row))
+        self.columns = list(columns)
+        self._values = {
+            column: [row.get(column, _MISSING) for row in rows]
+            for column in self.columns
+        }
+        self._length = len(rows)
+        self._offset = {column: 0 for column in COORDINATE_COLUMNS}
+        self._indexes = {}
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(*index.indices(self._length))]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("table row index out of range")
+        return self._row(index)
+
+    def __iter__(self):
+        for index in range(self._length):
+            yield self._row(index)
+
+    def __eq__(self, other):
+        if isinstance(other, (OCRTable, list)):
+            return len(self) == len(other) and all(
+                mine == theirs for mine, theirs in zip(self, other)
+            )
+        return NotImplemented
+
+    def __repr__(self):
+        return f"OCRTable({self.to_list()!r})"
+
+    def to_list(self) -> List[dict]:
+        """Returns the rows as a list of dicts, e.g. for writing JSON."""
+        return list(self)
+
+    def column(self, name: str) -> list:
+        """Returns the values of a column, None for rows without it."""
+        offset = self._offset.get(name, 0)
+        return [
+            None if value is _MISSING else self._shift(value, offset)
+            for value in self._values.get(name, [])
+        ]
+
+    def offset_coordinates(self, left: int, top: int):
+        """
+        Moves the x and y coordinates of all rows, e.g. from window to
+        screen coordinates. The rows are not copied. Returns the table.
+        """
+        self._offset["x"] += left
+        self._offset["y"] += top
+        return self
+
+    def find(self, criteria: Dict[str, object]) -> List[dict]:
+        """Returns all rows where every column of the criteria has its value."""
+        return [self._row(index) for index in self._find(criteria)]
+
+    def find_first(self, criteria: Dict[str, object]):
+        """Returns the first row matching all criteria, or None."""
+        indexes = self._find(criteria)
+        return self._row(indexes[0]) if indexes else None
+
+    def _find(self, criteria):
+        if not criteria:
+            return list(range(self._length))
+        postings = []
+        for column, value in criteria.items():
+            if column not in self._values:
+                return []
+            if column in self._offset:
+                # Coordinates are indexed without the offset
+                value = value - self._offset[column]
+            postings.append((column, value, self._index(column).get(value, [])))
+        postings.sort(key=lambda posting: len(posting[2]))
+        _, _, candidates = postings[0]
+        return [
+            index
+            for index in candidates
+            if all(
+                self._values[column][index] == value
+                for column, value, _ in postings[1:]
+            )
+        ]
+
+    def _index(self, column):
+        index = self._indexes.get(column)
+        if index is None:
+            index = {}
+            for row, value in enumerate(self._values[column]):
+                if value is not _MISSING:
+                    index.setdefault(value, []).append(row)
+            self._indexes[column] = index
+        return index
+
+    def _row(self, index):
+        row = {}
+        for column, values in self._values.items():
+            value = values[index]
+            if value is not _MISSING:
+                row[column] = self._shift(value, self._offset.get(column, 0))
+        return row
+
+    @staticmethod
+    def _shift(value, offset):
+        return int(value + offset) if offset else value
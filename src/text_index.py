@@ -0,0 +1,162 @@
+import unicodedata
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+# Length of the character n-grams used for substring and fuzzy lookups
+NGRAM_SIZE = 3
+
+
+def normalize_text(text: str, case_sensitive: bool = False):
+    """Normalizes unicode forms and whitespace, and case unless case sensitive."""
+    text = " ".join(unicodedata.normalize("NFKC", text).split())
+    return text if case_sensitive else text.casefold()
+
+
+def ngrams(text: str, size: int = NGRAM_SIZE):
+    return {text[i : i + size] for i in range(len(text) - size + 1)}
+
+
+def edit_distance(first: str, second: str, max_distance: int, substring=False):
+    """
+    Returns the Levenshtein distance of the strings, or the smallest distance
+    of ``first`` to any substring of ``second`` when ``substring`` is True.
+
+    Returns None as soon as the distance is known to exceed ``max_distance``.
+    """
+    if not substring and abs(len(first) - len(second)) > max_distance:
+        return None
+    # Rows are indexed by the characters of second so that a substring
+    # match may start anywhere in it
+    previous = list(range(len(first) + 1))
+    best = previous[-1] if substring else None
+    for j, character in enumerate(second, 1):
+        current = [0 if substring else j]
+        for i, other in enumerate(first, 1):
+            current.append(
+                min(
+                    previous[i] + 1,
+                    current[i - 1] + 1,
+                    previous[i - 1] + (other != character),
+                )
+            )
+        if substring:
+            best = min(best, current[-1])
+        elif min(current) > max_distance:
+            return None
+        previous = current
+    distance = best if substring else previous[-1]
+    return distance if distance <= max_distance else None
+
+
+class TextIndex:
+    """
+    Index of text blocks for repeated lookups on the same ``find_texts`` result.
+
+    Exact lookups use a map of normalized texts, substring and fuzzy lookups
+    narrow the candidates with a character n-gram index before comparing.
+    Matches are ranked by edit distance, fuzzy matches of the same distance
+    by OCR confidence, and then kept in reading order.
+    """
+
+    def __init__(self, text_blocks: Iterable[dict], case_sensitive: bool = False):
+        self.blocks = list(text_blocks)
+        self.case_sensitive = case_sensitive
+        self._texts = [
+            normalize_text(block["text"], case_sensitive) for block in self.blocks
+        ]
+        self._exact = defaultdict(list)
+        self._ngrams = defaultdict(set)
+        for index, text in enumerate(self._texts):
+            self._exact[text].append(index)
+            for gram in ngrams(text):
+                self._ngrams[gram].add(index)
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def find(self, search: str, inclusive: bool = False, max_distance: int = 0):
+        """
+        Returns the matching blocks as dicts with the ``block``, its ``index``
+        and the edit ``distance``, best matches first. Exact matches are in
+        reading order, fuzzy matches of the same distance are ordered by OCR
+        confidence first.
+
+        Arguments:
+        - search: text to look for
+        - inclusive: if True, the search may match a part of the text
+        - max_distance: number of character edits allowed between the search
+          and the text, 0 for exact matches
+        """
+        return self.find_many([search], inclusive, max_distance)[search]
+
+    def find_many(
+        self, searches: Iterable[str], inclusive: bool = False, max_distance: int = 0
+    ) -> Dict[str, List[dict]]:
+        """
+        Returns the matches of every search by search, see ``find``.
+
+        The n-gram index is walked once for all of the searches.
+        """
+        searches = list(dict.fromkeys(searches))
+        normalized = [
+            normalize_text(search, self.case_sensitive) for search in searches
+        ]
+        if max_distance == 0 and not inclusive:
+            candidates = [self._exact.get(search, []) for search in normalized]
+        else:
+            candidates = self._candidates(normalized, max_distance)
+        return {
+            search: self._rank(text, indexes, inclusive, max_distance)
+            for search, text, indexes in zip(searches, normalized, candidates)
+        }
+
+    def _rank(self, search, candidates, inclusive, max_distance):
+        distances = {}
+        for index in candidates:
+            text = self._texts[index]
+            if max_distance == 0:
+                distance = (
+                    0 if (search in text if inclusive else search == text) else None
+                )
+            else:
+                distance = edit_distance(search, text, max_distance, inclusive)
+            if distance is not None:
+                distances[index] = distance
+
+        def order(index):
+            # Exact matches stay in the order of the blocks on screen
+            distance = distances[index]
+            if distance == 0:
+                return distance, 0.0, index
+            return distance, -float(self.blocks[index].get("conf", -1)), index
+
+        return [
+            {"block": self.blocks[index], "index": index, "distance": distances[index]}
+            for index in sorted(distances, key=order)
+        ]
+
+    def _candidates(self, searches, max_distance):
+        """The candidate block indexes of every search, in one index pass."""
+        searches_by_gram = defaultdict(list)
+        required = []
+        for position, search in enumerate(searches):
+            grams = ngrams(search)
+            # A text within max_distance edits shares at least this many
+            # n-grams with the search, each edit breaks at most NGRAM_SIZE
+            required.append(len(grams) - max_distance * NGRAM_SIZE)
+            if required[-1] > 0:
+                for gram in grams:
+                    searches_by_gram[gram].append(position)
+        counts = [defaultdict(int) for _ in searches]
+        for gram, positions in searches_by_gram.items():
+            for index in self._ngrams.get(gram, ()):
+                for position in positions:
+                    counts[position][index] += 1
+        return [
+            (
+                range(len(self.blocks))
+                if needed <= 0
+                else sorted(index for index, count in found.items() if count >= needed)
+            )
+            for needed, found in zip(required, counts)
+        ]
@@ -0,0 +1,100 @@
+from typing import List
+
+import numpy as np
+from PIL import Image
+
+# Rows whose darkest and brightest pixels differ less than this are gaps
+GAP_CONTRAST = 32
+
+
+def split_into_bands(image: Image.Image, band_height: int, overlap: int):
+    """
+    Splits the image into horizontal (top, bottom) bands of at most
+    ``band_height`` pixels that overlap by ``overlap`` pixels.
+
+    Cuts are moved up to the nearest gap between text lines in the last
+    quarter of the band, when there is one.
+    """
+    if overlap * 2 >= band_height:
+        raise ValueError(
+            f"Band overlap {overlap} must be less than half of the band height "
+            f"{band_height}"
+        )
+    if image.height <= band_height:
+        return [(0, image.height)]
+    gray = np.asarray(image.convert("L"))
+    gaps = np.flatnonzero(
+        gray.max(axis=1).astype(int) - gray.min(axis=1) < GAP_CONTRAST
+    )
+    bands = []
+    top = 0
+    while True:
+        bottom = top + band_height
+        if bottom >= image.height:
+            bands.append((top, image.height))
+            return bands
+        start = np.searchsorted(gaps, bottom - band_height // 4)
+        end = np.searchsorted(gaps, bottom, side="right")
+        if end > start:
+            bottom = int(gaps[end - 1]) + 1
+        bands.append((top, bottom))
+        top = max(bottom - overlap, top + 1)
+
+
+def box_overlap(first: dict, second: dict):
+    """Returns the IoU of two text blocks and the share of the smaller covered."""
+    width = min(first["right"], second["right"]) - max(first["left"], second["left"])
+    height = min(first["bottom"], second["bottom"]) - max(first["top"], second["top"])
+    if width <= 0 or height <= 0:
+        return 0.0, 0.0
+    intersection = width * height
+    areas = [
+        (block["right"] - block["left"]) * (block["bottom"] - block["top"])
+        for block in (first, second)
+    ]
+    union = areas[0] + areas[1] - intersection
+    return intersection / union, intersection / max(min(areas), 1e-9)
+
+
+def merge_bands(
+    bands: List[tuple],
+    band_texts: List[list],
+    height: int,
+    iou: float = 0.5,
+):
+    """
+    Merges the text blocks of overlapping bands into one list.
+
+    Blocks of neighbouring bands are the same word when their boxes have
+    ``iou`` or more IoU, the texts are equal and the boxes touch, or one box
+    lies within the other. The reading further from a band cut is kept.
+    """
+    merged = []
+    distances = []
+    for index, ((top, bottom), text_blocks) in enumerate(zip(bands, band_texts)):
+        previous_bottom = bands[index - 1][1] if index else 0
+        for block in text_blocks:
+            distance = min(
+                block["y"] - top if top > 0 else height,
+                bottom - block["y"] if bottom < height else height,
+            )
+            duplicate = None
+            if block["top"] < previous_bottom:
+                for candidate, other in enumerate(merged):
+                    if other["bottom"] <= top:
+                        continue
+                    box_iou, covered = box_overlap(block, other)
+                    if (
+                        box_iou >= iou
+                        or covered >= 0.8
+                        or (covered > 0 and block["text"] == other["text"])
+                    ):
+                        duplicate = candidate
+                        break
+            if duplicate is None:
+                merged.append(block)
+                distances.append(distance)
+            elif distance > distances[duplicate]:
+                merged[duplicate] = block
+                distances[duplicate] = distance
+    return merged
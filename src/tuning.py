@@ -0,0 +1,290 @@
+"""
+Searches OCR preprocessing settings that read the given images best.
+
+Every candidate configuration reads the images and is scored by the cell
+accuracy against the expected tables and by the time spent in Tesseract.
+
+Run from the repository root with src and the root on PYTHONPATH:
+
+    python -m tuning --image images/table.png --expected data/result_table.json
+"""
+
+import argparse
+import importlib
+import itertools
+import json
+import logging
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, replace
+from typing import Dict, List
+
+from PIL import Image
+
+from configuration import TableConfiguration
+from evaluation import compare_tables
+from OCRLibrary import ocr_table
+from preprocess import cache_zoomed_images, load_image
+
+SEARCH_SPACE = {
+    "brightness": [1.0, 1.2, 1.4, 1.6],
+    "contrast": [1.0, 1.2, 1.5],
+    "threshold": [-1, 150, 190],
+    "zoom_factor": [2, 4, 8],
+    "tesseract_psm_mode": [4, 6],
+    "sharpen": [False, True],
+    "invert_colors": [False],
+}
+SEARCH_STRATEGIES = ("grid", "halving")
+
+
+@dataclass
+class TuningCase:
+    """Image and the table expected to be read from it."""
+
+    image: str
+    expected: list
+
+    @classmethod
+    def load(cls, image: str, expected: str):
+        with open(expected, encoding="utf-8") as infile:
+            return cls(image, json.load(infile))
+
+
+def grid(search_space: Dict[str, list]) -> List[dict]:
+    """Returns every combination of the values of the search space."""
+    names = list(search_space)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(search_space[name] for name in names))
+    ]
+
+
+def crop_case(image: Image.Image, expected: list, fraction: float):
+    """
+    Returns the top part of the image holding about ``fraction`` of the
+    expected rows, and those rows. Needs the y coordinates of the rows.
+    """
+    kept = max(1, math.ceil(len(expected) * fraction))
+    if kept >= len(expected) or any("y" not in row for row in expected):
+        return image, expected
+    bottom = int((expected[kept - 1]["y"] + expected[kept]["y"]) / 2)
+    return image.crop((0, 0, image.width, bottom)), expected[:kept]
+
+
+def rank_key(result: dict):
+    return (-result["cell_accuracy"], -result["character_accuracy"], result["seconds"])
+
+
+def pareto_front(results: List[dict]) -> List[dict]:
+    """Returns the results that no other result beats in both accuracy and time."""
+    front = []
+    for result in sorted(results, key=rank_key):
+        if not front or result["seconds"] < front[-1]["seconds"]:
+            front.append(result)
+    return front
+
+
+# Images of the cases, loaded once per worker process
+_images = []
+
+
+def _load_cases(images: List[str], zoom_factors: int):
+    _images[:] = [load_image(image) for image in images]
+    # The zoomed grayscale images are shared by candidates of the same zoom
+    cache_zoomed_images(len(images) * zoom_factors)
+
+
+def _evaluate(configuration, candidates, expected_tables, fraction):
+    results = []
+    for candidate in candidates:
+        candidate_configuration = replace(configuration, **candidate)
+        cell_accuracy = character_accuracy = seconds = 0.0
+        errors = []
+        for image, expected in zip(_images, expected_tables):
+            image, expected = crop_case(image, expected, fraction)
+            try:
+                table, metrics = ocr_table(
+                    candidate_configuration, image, return_metrics=True
+                )
+            except Exception as error:  # scored as nothing read
+                errors.append(str(error))
+                table = []
+            else:
+                seconds += metrics.stages.get("tesseract", 0.0)
+            comparison = compare_tables(expected, table)
+            cell_accuracy += comparison["cell_accuracy"]
+            character_accuracy += comparison["character_accuracy"]
+        results.append(
+            {
+                "candidate": candidate,
+                "fraction": fraction,
+                "cell_accuracy": cell_accuracy / len(expected_tables),
+                "character_accuracy": character_accuracy / len(expected_tables),
+                "seconds": seconds,
+                "errors": errors,
+            }
+        )
+    return results
+
+
+def _batches(candidates, workers):
+    # Candidates of the same zoom go to the same process to share its cache
+    by_zoom = {}
+    for candidate in candidates:
+        by_zoom.setdefault(candidate.get("zoom_factor"), []).append(candidate)
+    size = max(1, math.ceil(len(candidates) / (workers * 2)))
+    for group in by_zoom.values():
+        for start in range(0, len(group), size):
+            yield group[start : start + size]
+
+
+def tune(
+    configuration: TableConfiguration,
+    cases: List[TuningCase],
+    search_space: Dict[str, list] = None,
+    strategy: str = "halving",
+    workers: int = None,
+    eta: int = 3,
+    min_fraction: float = 0.1,
+):
+    """
+    Searches the configuration values that read the cases best.
+
+    Arguments:
+    - configuration: base configuration with the headers and columns
+    - cases: images with their expected tables
+    - search_space: values to try per configuration field, ``SEARCH_SPACE``
+      by default
+    - strategy: "grid" reads every case fully with every candidate,
+      "halving" reads a part of the rows with all candidates and keeps the
+      best 1 / ``eta`` of them for reading more rows, down to full cases
+    - workers: number of processes, defaults to the number of CPUs
+    - min_fraction: smallest share of the rows candidates are scored on
+
+    Returns a dictionary with the ``best`` configuration values and the
+    scored ``results`` and ``pareto`` front of accuracy and OCR time.
+    """
+    if strategy not in SEARCH_STRATEGIES:
+        raise ValueError(
+            f"Unknown search strategy: {strategy}. Expected one of {SEARCH_STRATEGIES}"
+        )
+    search_space = search_space or SEARCH_SPACE
+    configuration = replace(
+        configuration,
+        show_pre_ocr_image=False,
+        show_post_recognition_image=False,
+        debug_artifacts="none",
+        use_ocr_cache=False,
+        use_layout_cache=False,
+    )
+    candidates = grid(search_space)
+    workers = workers or os.cpu_count() or 1
+    fractions = [1.0]
+    if strategy == "halving":
+        rounds = math.ceil(math.log(max(len(candidates), 1), eta))
+        fractions = [eta**-i for i in range(rounds, 0, -1) if eta**-i >= min_fraction]
+        fractions.append(1.0)
+    expected_tables = [case.expected for case in cases]
+    zoom_factors = len(search_space.get("zoom_factor", [None]))
+    started = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_load_cases,
+        initargs=([case.image for case in cases], zoom_factors),
+    ) as executor:
+        for fraction in fractions:
+            logging.info(f"Scoring {len(candidates)} candidates on {fraction:.0%}")
+            futures = [
+                executor.submit(
+                    _evaluate, configuration, batch, expected_tables, fraction
+                )
+                for batch in _batches(candidates, workers)
+            ]
+            results = sorted(
+                (result for future in futures for result in future.result()),
+                key=rank_key,
+            )
+            if fraction < 1.0:
+                keep = max(1, math.ceil(len(results) / eta))
+                candidates = [result["candidate"] for result in results[:keep]]
+    return {
+        "best": results[0]["candidate"],
+        "results": results,
+        "pareto": pareto_front(results),
+        "strategy": strategy,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def load_configuration(name: str):
+    """Returns the configuration made by a ``module:function`` name."""
+    module, _, function = name.partition(":")
+    return getattr(importlib.import_module(module), function)()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--image", action="append", required=True)
+    parser.add_argument(
+        "--expected",
+        action="append",
+        required=True,
+        help="expected table JSON for each --image, in the same order",
+    )
+    parser.add_argument(
+        "--configuration",
+        default="tasks:sample_table_configuration",
+        help="module:function returning the base table configuration",
+    )
+    parser.add_argument("--search", choices=SEARCH_STRATEGIES, default="halving")
+    parser.add_argument("--space", help="JSON object replacing values of the space")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--output", default="output/tuning.json")
+    args = parser.parse_args(argv)
+    if len(args.image) != len(args.expected):
+        parser.error("give an --expected table for every --image")
+
+    search_space = dict(SEARCH_SPACE)
+    if args.space:
+        search_space.update(json.loads(args.space))
+    cases = [
+        TuningCase.load(image, expected)
+        for image, expected in zip(args.image, args.expected)
+    ]
+    report = tune(
+        load_configuration(args.configuration),
+        cases,
+        search_space=search_space,
+        strategy=args.search,
+        workers=args.workers,
+        eta=args.eta,
+    )
+    report["cases"] = [asdict(case) for case in cases]
+
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as outfile:
+        json.dump(report, outfile, indent=4)
+    best = report["results"][0]
+    print(
+        f"Best of {len(report['results'])} in {report['seconds']:.1f}s: "
+        f"cell accuracy {best['cell_accuracy']:.1%}, "
+        f"Tesseract {best['seconds']:.2f}s"
+    )
+    for name, value in report["best"].items():
+        print(f"    table_conf.{name} = {value!r}")
+    for result in report["pareto"][1:]:
+        print(
+            f"Faster: {result['cell_accuracy']:.1%} in {result['seconds']:.2f}s "
+            f"with {result['candidate']}"
+        )
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
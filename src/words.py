@@ -0,0 +1,231 @@
+from collections.abc import Mapping
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+# Box fields of a word, coordinates are in the original image scale
+WORD_DTYPE = np.dtype(
+    [
+        ("left", np.float64),
+        ("top", np.float64),
+        ("right", np.float64),
+        ("bottom", np.float64),
+        ("x", np.int64),
+        ("y", np.int64),
+        ("conf", np.int64),
+    ]
+)
+
+
+def group_rows(tops: np.ndarray, lefts: np.ndarray, tolerance, top_offset):
+    """
+    Groups words into rows like ``combine_by_top_range``.
+
+    Returns a list of (row top, word indexes ordered by left) in the order of
+    the rows. A word starts a new row when its top is more than ``tolerance``
+    below the top of the first word of the current row.
+    """
+    order = np.argsort(tops, kind="stable")
+    values = tops[order] - top_offset
+    rows = []
+    start = 0
+    while start < len(values):
+        row_top = values[start]
+        end = int(np.searchsorted(values, row_top + tolerance, side="right"))
+        # Settle rounding differences with the exact comparison
+        while end < len(values) and not values[end] - row_top > tolerance:
+            end += 1
+        while end > start + 1 and values[end - 1] - row_top > tolerance:
+            end -= 1
+        indexes = order[start:end]
+        rows.append(
+            (row_top.item(), indexes[np.argsort(lefts[indexes], kind="stable")])
+        )
+        start = end
+    return rows
+
+
+class WordStore:
+    """
+    Words read by Tesseract stored as arrays.
+
+    The boxes are kept in a structured array of ``WORD_DTYPE`` and the texts in
+    a separate string array, so filtering, rescaling, grouping and column
+    assignment run as array operations. ``columns`` holds the column names of
+    words read by column OCR. ``to_dicts`` returns the text blocks
+    ``find_texts`` has always returned.
+    """
+
+    def __init__(self, boxes: np.ndarray, texts: np.ndarray, columns=None):
+        self.boxes = boxes
+        self.texts = texts
+        self.columns = columns
+
+    @classmethod
+    def from_ocr_data(cls, ocr_data: Dict[str, list], zoom_factor, confidence_level):
+        """
+        Builds the store from ``image_to_data`` output of an image zoomed by
+        ``zoom_factor``, leaving out empty words and words with a confidence
+        below ``confidence_level``.
+        """
+        texts = np.char.strip(np.asarray(ocr_data["text"], dtype=str))
+        conf = np.asarray(ocr_data["conf"], dtype=np.float64).astype(np.int64)
+        keep = (texts != "") & (conf >= confidence_level)
+        start_x = np.asarray(ocr_data["left"], dtype=np.int64)[keep]
+        start_y = np.asarray(ocr_data["top"], dtype=np.int64)[keep] - 5
+        end_x = start_x + np.asarray(ocr_data["width"], dtype=np.int64)[keep]
+        end_y = start_y + np.asarray(ocr_data["height"], dtype=np.int64)[keep]
+        boxes = np.empty(len(start_x), dtype=WORD_DTYPE)
+        boxes["left"] = start_x / zoom_factor
+        boxes["top"] = start_y / zoom_factor
+        boxes["right"] = end_x / zoom_factor
+        boxes["bottom"] = end_y / zoom_factor
+        boxes["x"] = np.trunc((start_x + end_x) // 2 / zoom_factor)
+        boxes["y"] = np.trunc((start_y + end_y) // 2 / zoom_factor)
+        boxes["conf"] = conf[keep]
+        return cls(boxes, texts[keep])
+
+    @classmethod
+    def from_dicts(cls, text_blocks: List[dict]):
+        """Builds the store from text blocks, e.g. cached ``find_texts`` results."""
+        boxes = np.empty(len(text_blocks), dtype=WORD_DTYPE)
+        for name in WORD_DTYPE.names:
+            boxes[name] = [block.get(name, -1) for block in text_blocks]
+        texts = np.asarray([block["text"] for block in text_blocks], dtype=str)
+        columns = None
+        if any("column" in block for block in text_blocks):
+            columns = np.array([block.get("column") for block in text_blocks])
+        return cls(boxes, texts, columns)
+
+    @classmethod
+    def concatenate(cls, stores: Sequence["WordStore"]):
+        """Joins the stores into one, keeping the column names of the words."""
+        if not stores:
+            return cls(np.empty(0, dtype=WORD_DTYPE), np.empty(0, dtype=str))
+        columns = None
+        if any(store.columns is not None for store in stores):
+            columns = np.concatenate(
+                [
+                    (
+                        store.columns
+                        if store.columns is not None
+                        else np.full(len(store), None)
+                    )
+                    for store in stores
+                ]
+            )
+        return cls(
+            np.concatenate([store.boxes for store in stores]),
+            np.concatenate([store.texts for store in stores]),
+            columns,
+        )
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def select(self, indexes):
+        """Returns a store of the words at the indexes, slice or boolean mask."""
+        return WordStore(
+            self.boxes[indexes],
+            self.texts[indexes],
+            None if self.columns is None else self.columns[indexes],
+        )
+
+    def offset(self, offset_x, offset_y):
+        """Returns a store with the coordinates moved by the offsets."""
+        boxes = self.boxes.copy()
+        for name in ("left", "right", "x"):
+            boxes[name] += offset_x
+        for name in ("top", "bottom", "y"):
+            boxes[name] += offset_y
+        return WordStore(boxes, self.texts, self.columns)
+
+    def tag_column(self, column_name: str):
+        """Returns a store whose words all belong to the named column."""
+        return WordStore(
+            self.boxes, self.texts, np.full(len(self), column_name, dtype=object)
+        )
+
+    def row_groups(self, tolerance, top_offset: int = 4):
+        return group_rows(self.boxes["top"], self.boxes["left"], tolerance, top_offset)
+
+    def rows(self, tolerance, top_offset: int = 4):
+        """Returns the words grouped into rows as ``combine_by_top_range`` does."""
+        groups = self.row_groups(tolerance, top_offset)
+        order = (
+            np.concatenate([indexes for _, indexes in groups])
+            if groups
+            else np.empty(0, dtype=np.int64)
+        )
+        starts = np.cumsum([0] + [len(indexes) for _, indexes in groups])
+        return WordRows(self.select(order), [top for top, _ in groups], starts)
+
+    def assign_columns(self, column_index, mode: str = "contained"):
+        """Returns the column name, or None, of every word."""
+        return column_index.assign_many(self.boxes["left"], self.boxes["right"], mode)
+
+    def to_dicts(self) -> List[dict]:
+        fields = {name: self.boxes[name].tolist() for name in WORD_DTYPE.names}
+        blocks = [
+            {
+                "text": text,
+                "x": x,
+                "y": y,
+                "left": left,
+                "top": top,
+                "right": right,
+                "bottom": bottom,
+                "conf": conf,
+            }
+            for text, x, y, left, top, right, bottom, conf in zip(
+                self.texts.tolist(),
+                fields["x"],
+                fields["y"],
+                fields["left"],
+                fields["top"],
+                fields["right"],
+                fields["bottom"],
+                fields["conf"],
+            )
+        ]
+        if self.columns is not None:
+            for block, column_name in zip(blocks, self.columns.tolist()):
+                if column_name is not None:
+                    block["column"] = column_name
+        return blocks
+
+
+class WordRows(Mapping):
+    """
+    Words grouped into rows, as returned by ``combine_by_top_range`` for a
+    ``WordStore``.
+
+    The words are kept in one store in row order, the words of row ``i``
+    being ``store[starts[i]:starts[i + 1]]``. Like the dict of rows it maps
+    the row tops to lists of text blocks, which are made only when a row is
+    accessed that way.
+    """
+
+    def __init__(self, store: WordStore, tops: List[float], starts: np.ndarray):
+        self.store = store
+        self.tops = tops
+        self.starts = starts
+        self._positions = {top: index for index, top in enumerate(tops)}
+
+    def __getitem__(self, top):
+        return self.row(self._positions[top]).to_dicts()
+
+    def __iter__(self):
+        return iter(self.tops)
+
+    def __len__(self):
+        return len(self.tops)
+
+    def row(self, index: int) -> WordStore:
+        return self.store.select(slice(self.starts[index], self.starts[index + 1]))
+
+    def row_texts(self):
+        """Yields the top and the word texts of every row."""
+        texts = self.store.texts.tolist()
+        for index, top in enumerate(self.tops):
+            yield top, texts[self.starts[index] : self.starts[index + 1]]
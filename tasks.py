@@ -2,8 +2,8 @@ from robocorp.tasks import task
 from OCRLibrary import ocr_table, TableConfiguration
 
 
-@task
-def main_ocr_task():
+def sample_table_configuration():
+    """Configuration for reading the table in images/table.png"""
     table_headers = [
         "Date",
         "Payee",
@@ -31,6 +31,12 @@ def main_ocr_task():
 
     table_conf.column_to_crop.append("Amount")
     table_conf.column_to_crop.append("Balance")
+    return table_conf
+
+
+@task
+def main_ocr_task():
+    table_conf = sample_table_configuration()
     table = ocr_table(
         configuration=table_conf,
         image_in="images/table.png",